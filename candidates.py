@@ -0,0 +1,105 @@
+"""Validation of candidate handles before they reach the browser.
+
+get_users.py turns every ``x.com/<segment>`` link of a search result into a
+username, which also catches site paths such as ``/search``, ``/i/status``
+or ``/hashtag``. Every such candidate used to cost a full browser session in
+fetch_user.py. CandidateFilter normalizes handles (whitespace, a leading
+``@``, profile URLs), rejects reserved paths and strings that cannot be a
+handle, merges case-insensitive duplicates across all inputs and counts what
+it dropped so the run can report it.
+"""
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from journal import load_json_list
+
+HANDLE_RE = re.compile(r"^[A-Za-z0-9_]{1,15}$")
+PROFILE_URL_RE = re.compile(r"^(?:https?://)?(?:www\.|mobile\.)?(?:x|twitter)\.com/([^/?#]+)", re.IGNORECASE)
+
+# First path segments of x.com / twitter.com pages that are not profiles
+RESERVED_PATHS = frozenset({
+    "about", "account", "compose", "download", "explore", "hashtag", "help", "home", "i", "intent",
+    "jobs", "login", "logout", "messages", "notifications", "privacy", "search", "settings",
+    "share", "signup", "tos", "who_to_follow", "x", "twitter",
+})
+
+MAX_EXAMPLES = 5  # dropped handles listed per reason in the report
+
+
+def normalize_handle(raw: str) -> str:
+    """``" @Foo "`` and ``"https://x.com/Foo/status/1"`` both become ``"Foo"``."""
+    handle = (raw or "").strip()
+    match = PROFILE_URL_RE.match(handle)
+    if match:
+        handle = match.group(1)
+    return handle.lstrip("@")
+
+
+def rejection_reason(handle: str) -> Optional[str]:
+    """Why a normalized handle cannot be a profile, or None if it looks valid."""
+    if handle.lower() in RESERVED_PATHS:
+        return "reserved path"
+    if not HANDLE_RE.match(handle):
+        return "invalid handle"
+    return None
+
+
+class CandidateFilter:
+    def __init__(self):
+        self.seen: Dict[str, str] = {}  # lower-cased handle -> first spelling seen
+        self.dropped: Counter = Counter()
+        self.examples: Dict[str, List[str]] = {}
+        self.checked = 0
+
+    def _drop(self, reason: str, raw: str) -> None:
+        self.dropped[reason] += 1
+        examples = self.examples.setdefault(reason, [])
+        if len(examples) < MAX_EXAMPLES:
+            examples.append(repr(raw))
+
+    def check(self, raw: str) -> Optional[str]:
+        """The normalized handle, or None (and counted) if it is reserved or invalid."""
+        self.checked += 1
+        handle = normalize_handle(raw)
+        reason = rejection_reason(handle)
+        if reason:
+            self._drop(reason, raw)
+            return None
+        return handle
+
+    def add(self, raw: str) -> Optional[str]:
+        """Like ``check``, but also None for a case-insensitive duplicate of an earlier handle."""
+        handle = self.check(raw)
+        if handle is None:
+            return None
+        if handle.lower() in self.seen:
+            if self.seen[handle.lower()] != handle:
+                self._drop("case duplicate", f"{raw} (kept {self.seen[handle.lower()]})")
+            else:
+                self._drop("duplicate", raw)
+            return None
+        self.seen[handle.lower()] = handle
+        return handle
+
+    def report(self, label: str = "candidates") -> str:
+        lines = [f"{label}: {self.checked - sum(self.dropped.values())} of {self.checked} kept"]
+        for reason, count in self.dropped.most_common():
+            lines.append(f"  dropped {count} ({reason}): " + ", ".join(self.examples[reason])
+                         + (", ..." if count > len(self.examples[reason]) else ""))
+        return "\n".join(lines)
+
+
+def load_candidates(paths: List[str], candidates: Optional[CandidateFilter] = None,
+                    field: str = "Twitter Username") -> List[str]:
+    """Valid, de-duplicated handles from one or more JSON lists, in input order."""
+    candidates = candidates or CandidateFilter()
+    handles = []
+    for path in paths:
+        # Journaled lists (users_extended.json) include records not yet compacted
+        for entry in load_json_list(path):
+            if isinstance(entry, dict):
+                handle = candidates.add(entry.get(field) or "")
+                if handle is not None:
+                    handles.append(handle)
+    return handles
@@ -2,6 +2,8 @@ import asyncio
 import json
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
+from journal import JsonJournal
+
 async def get_photo_image_url(username):
     url = f"https://x.com/{username}/photo"
     async with async_playwright() as p:
@@ -28,27 +30,24 @@ async def main():
         data = json.load(f)
 
     usernames = [entry["Twitter Username"] for entry in data]
-    results = []
     output_file = "profile_images_links.json"
 
-    # Try to load existing results if the script was interrupted before
+    # Results of an interrupted run come back from the JSON file plus its journal
+    results = JsonJournal(output_file, key=lambda r: r["username"], indent=2)
+    done_usernames = {entry["username"] for entry in results.load()}
+
     try:
-        with open(output_file, "r", encoding="utf-8") as f:
-            results = json.load(f)
-        done_usernames = {entry["username"] for entry in results}
-    except (FileNotFoundError, json.JSONDecodeError):
-        done_usernames = set()
-
-    for username in usernames:
-        if username in done_usernames:
-            print(f"Already fetched for {username}, skipping.")
-            continue
-        print(f"Fetching for {username}...")
-        image_url = await get_photo_image_url(username)
-        results.append({"username": username, "image_url": image_url})
-        # Save after each fetch
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        for username in usernames:
+            if username in done_usernames:
+                print(f"Already fetched for {username}, skipping.")
+                continue
+            print(f"Fetching for {username}...")
+            image_url = await get_photo_image_url(username)
+            # Appended to profile_images_links.json.journal right away, the JSON file is rewritten in batches
+            results.append({"username": username, "image_url": image_url})
+            done_usernames.add(username)
+    finally:
+        results.close()
 
     print("Results saved to profile_images_links.json")
 
@@ -8,26 +8,30 @@ import asyncio
 import json
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 
-async def get_photo_image_url(username):
-    url = f"https://x.com/{username}/photo"
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
+async def get_photo_image_url(username, pool=None):
+    if pool is None:
         try:
-            await page.goto(url, wait_until="domcontentloaded")
+            async with BrowserPool() as own_pool:
+                return await get_photo_image_url(username, own_pool)
+        except RuntimeError as e:
+            print(f"Error for {username}: {e}")
+            return None
+
+    url = f"https://x.com/{username}/photo"
+    try:
+        async with pool.page() as page:
+            await limited_goto(page, url, wait_until="domcontentloaded")
             await page.wait_for_selector("img", timeout=10000)
             imgs = await page.query_selector_all("img")
             for img in imgs:
                 src = await img.get_attribute("src")
                 if src and "profile_images" in src:
-                    await browser.close()
                     return src
-        except PlaywrightTimeoutError:
-            print(f"Timeout for {username}, skipping.")
-        except Exception as e:
-            print(f"Error for {username}: {e}")
-        await browser.close()
-        return None
+    except PlaywrightTimeoutError:
+        print(f"Timeout for {username}, skipping.")
+    except Exception as e:
+        print(f"Error for {username}: {e}")
+    return None
 
 # Fix Windows unicode output
 sys.stdout.reconfigure(encoding='utf-8')
@@ -36,25 +40,77 @@ sys.stderr.reconfigure(encoding='utf-8')
 import os
 import json
 import asyncio
+import argparse
 import random
+import re
 import hashlib
+import inspect
 import time
 import glob
-from datetime import datetime, date
+from datetime import datetime, date, timezone
+from contextlib import asynccontextmanager
 from typing import List, Dict, Optional, Tuple, Set
-from playwright.async_api import async_playwright, TimeoutError, Page
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from playwright.async_api import async_playwright, TimeoutError, Page, BrowserContext
 from pathlib import Path
 
+from rate_limiter import AdaptiveRateLimiter
+from profile_store import ProfileStore
+from candidates import CandidateFilter, load_candidates
+from negative_cache import NegativeCache, DEFAULT_DB as DEFAULT_NEGATIVE_CACHE, classify_failure, format_delay
+
 
 COOKIES_FILE = os.path.join('./twitter_cookies.json')
+SESSION_CACHE_FILE = os.path.join('./.session_cache.json')
+SESSION_CACHE_TTL = 6 * 3600  # seconds a successful login check stays valid for a cookie set
+SESSION_COOKIES = ("auth_token", "ct0")
 
 
 
 # Rate limiting configuration
-SCROLL_DELAY = 2  # Increased from 1 to 2 seconds between scrolls for better stability
-REQUEST_DELAY = 0.5  # seconds between requests
+REQUEST_DELAY = 0.5  # initial seconds between requests; adapted at runtime by RATE_LIMITER
+MIN_REQUEST_RATE = 0.1  # requests/second floor after repeated throttling
+MAX_REQUEST_RATE = 6.0  # requests/second ceiling while everything succeeds
 MAX_RETRIES = 2
 TIMEOUT = 10000  # 10 seconds (increased from 3 seconds)
+SCROLL_SETTLE_TIMEOUT = 6  # max seconds to wait for new items after a scroll
+
+# Browser pool configuration
+CONTEXT_RECYCLE_AFTER = 25  # close and recreate a browser context after this many leases
+
+# Network resource blocking (opt-in with --block-resources)
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_URL_PATTERNS = [
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "ads-twitter.com",
+    "ads-api.twitter.com",
+    "analytics.twitter.com",
+    "scribe.twitter.com",
+    "/1.1/jot/",
+    "/i/jot",
+    "client_event",
+]
+# Avatars are blocked too: their URL is read from the img src attribute, the
+# image bytes are never needed. --allow-avatars lets them load (e.g. to watch
+# a headed browser)
+AVATAR_URL_PATTERNS = ["pbs.twimg.com/profile_images/"]
+# Aborted requests never report a size, so saved bandwidth is estimated from typical payloads
+ESTIMATED_BLOCKED_BYTES = {"image": 40_000, "media": 250_000, "font": 50_000, "tracking": 2_000}
+
+# GraphQL operations whose responses carry timeline and follower data
+GRAPHQL_TIMELINE_OPERATIONS = ("UserTweets",)
+GRAPHQL_SOCIAL_OPERATIONS = ("Followers", "Following", "BlueVerifiedFollowers")
+GRAPHQL_DATE_FORMAT = '%a %b %d %H:%M:%S %z %Y'  # Wed Oct 10 20:19:24 +0000 2018
+
+# Mid-user checkpoints, so a crash does not lose what was gathered for a large account
+CHECKPOINT_DIR = os.path.join(os.path.dirname(__file__), "checkpoints")
+CHECKPOINT_INTERVAL = 15  # min seconds between checkpoint writes of one section
+CHECKPOINT_MAX_AGE = 24 * 3600  # older checkpoints are ignored and the user starts over
+
+# Records the iter_* generators buffer before the scroll loop waits for the consumer
+ITER_BUFFER_SIZE = 100
 
 def parse_tweet_date(tweet_date_str: str) -> Optional[date]:
     """Parse tweet date string to date object for comparison."""
@@ -139,10 +195,442 @@ async def safe_browser_close(browser):
     except Exception as e:
         print(f"Error closing browser: {str(e)}")
 
+# Process-wide limiter every navigation and scroll goes through
+RATE_LIMITER = AdaptiveRateLimiter(
+    rate=1 / REQUEST_DELAY,
+    min_rate=MIN_REQUEST_RATE,
+    max_rate=MAX_REQUEST_RATE,
+    name="twitter"
+)
+
+# Texts X shows in the timeline when it refuses to serve more content
+THROTTLE_TEXTS = ("Something went wrong", "Try reloading", "Rate limit exceeded")
+
 async def rate_limit_delay(delay: float = REQUEST_DELAY) -> None:
     """Add delay for rate limiting."""
     await asyncio.sleep(delay)
 
+async def limited_goto(page: Page, url: str, **kwargs):
+    """``page.goto`` paced by RATE_LIMITER, reporting 429 responses back to it."""
+    await RATE_LIMITER.acquire()
+    response = await page.goto(url, **kwargs)
+    if response is not None and response.status == 429:
+        RATE_LIMITER.on_throttle(f"HTTP 429 on {url}")
+    else:
+        RATE_LIMITER.on_success()
+    return response
+
+async def verify_login(page: Page) -> Optional[bool]:
+    """Check the login state of a page showing the Twitter home page.
+
+    Returns True when logged in, False when a login/signup wall is shown and
+    None when neither could be confirmed.
+    """
+    # Method 1: Check for login button (should not be present if logged in)
+    try:
+        login_button = page.locator('a[href="/login"]')
+        if await login_button.count() > 0:
+            print("Not logged in (login button found). Please run login_manual.py again.")
+            return False
+    except Exception as e:
+        print(f"Could not check for login button: {str(e)}")
+
+    # Method 2: Check for sign up button (should not be present if logged in)
+    try:
+        signup_button = page.locator('a[href="/i/flow/signup"]')
+        if await signup_button.count() > 0:
+            print("Not logged in (signup button found). Please run login_manual.py again.")
+            return False
+    except Exception as e:
+        print(f"Could not check for signup button: {str(e)}")
+
+    # Method 3: Try to find home timeline
+    try:
+        timeline = page.locator('div[data-testid="primaryColumn"]')
+        if await timeline.count() > 0:
+            print("Login verified - timeline found")
+            return True
+    except Exception as e:
+        print(f"Could not check for timeline: {str(e)}")
+
+    # Method 4: Check for profile link
+    try:
+        profile_link = page.locator('a[data-testid="AppTabBar_Profile_Link"]')
+        if await profile_link.count() > 0:
+            print("Login verified - profile link found")
+            return True
+    except Exception as e:
+        print(f"Could not check for profile link: {str(e)}")
+
+    # Method 5: Check for any authenticated content
+    try:
+        authenticated_selectors = [
+            'div[data-testid="SideNav_AccountSwitcher_Button"]',
+            'div[data-testid="AppTabBar_Home_Link"]',
+            'div[data-testid="AppTabBar_Explore_Link"]',
+            'div[data-testid="AppTabBar_Notifications_Link"]'
+        ]
+
+        for selector in authenticated_selectors:
+            element = page.locator(selector)
+            if await element.count() > 0:
+                print(f"Login verified - authenticated element found: {selector}")
+                return True
+    except Exception as e:
+        print(f"Could not check for authenticated elements: {str(e)}")
+
+    # Method 6: Check page title or URL for authentication
+    try:
+        current_url = page.url
+        if "twitter.com/home" in current_url or "x.com/home" in current_url:
+            print("Login verified - on home page")
+            return True
+    except Exception as e:
+        print(f"Could not check URL: {str(e)}")
+
+    return None
+
+def load_session_cookies(cookies_file: str = COOKIES_FILE) -> Tuple[List[Dict], str]:
+    """Load the cookie file and check the session cookies without a browser.
+
+    Returns the cookies and a fingerprint of the session cookie values.
+    Raises RuntimeError when the file is missing or ``auth_token``/``ct0``
+    are absent or expired.
+    """
+    if not os.path.exists(cookies_file):
+        raise RuntimeError("No cookies file found. Please run login_manual.py first")
+    with open(cookies_file, "r") as f:
+        cookies = json.load(f)
+
+    now = time.time()
+    session_values = []
+    for name in SESSION_COOKIES:
+        cookie = next((c for c in cookies if c.get("name") == name), None)
+        if cookie is None:
+            raise RuntimeError(f"Cookie '{name}' missing from {cookies_file}. Please run login_manual.py again.")
+        # Playwright exports use 'expires', browser extensions 'expirationDate'; -1 means session cookie
+        expires = cookie.get("expires", cookie.get("expirationDate", -1))
+        if expires not in (None, -1) and float(expires) <= now:
+            expired_at = datetime.fromtimestamp(float(expires)).strftime('%Y-%m-%d %H:%M')
+            raise RuntimeError(f"Cookie '{name}' expired on {expired_at}. Please run login_manual.py again.")
+        session_values.append(str(cookie.get("value", "")))
+
+    fingerprint = hashlib.sha256("|".join(session_values).encode()).hexdigest()[:16]
+    return cookies, fingerprint
+
+def _read_session_cache() -> Dict[str, float]:
+    try:
+        with open(SESSION_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _write_session_cache(cache: Dict[str, float]) -> None:
+    try:
+        tmp_path = f"{SESSION_CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, SESSION_CACHE_FILE)
+    except OSError as e:
+        print(f"Could not write session cache: {str(e)}")
+
+def is_session_cached(fingerprint: str) -> bool:
+    """True if this cookie set passed a login check less than SESSION_CACHE_TTL ago."""
+    validated_at = _read_session_cache().get(fingerprint)
+    return validated_at is not None and time.time() - validated_at < SESSION_CACHE_TTL
+
+def cache_session(fingerprint: str) -> None:
+    cache = _read_session_cache()
+    cache[fingerprint] = time.time()
+    _write_session_cache(cache)
+
+def invalidate_session(fingerprint: str) -> None:
+    cache = _read_session_cache()
+    if cache.pop(fingerprint, None) is not None:
+        _write_session_cache(cache)
+
+async def is_logged_out_page(page: Page) -> bool:
+    """Detect the login wall X shows instead of content when the session is gone."""
+    try:
+        if "/i/flow/login" in page.url or page.url.rstrip("/").endswith("/login"):
+            return True
+        return await page.locator('a[href="/login"]').count() > 0
+    except Exception:
+        return False
+
+class ResourceBlocker:
+    """Request router that aborts media, font and tracking requests on a context.
+
+    Counters are reset by the caller at the start of every user so the
+    savings can be reported per user.
+    """
+
+    def __init__(self, allow_avatar: bool = False):
+        self.allow_avatar = allow_avatar
+        self.reset()
+
+    def reset(self) -> None:
+        self.blocked: Dict[str, int] = {}
+        self.allowed = 0
+        self.estimated_bytes = 0
+
+    async def install(self, context: BrowserContext) -> None:
+        await context.route("**/*", self._handle)
+
+    def _classify(self, resource_type: str, url: str) -> Optional[str]:
+        """Return the reason a request should be blocked, or None to let it through."""
+        if self.allow_avatar and any(pattern in url for pattern in AVATAR_URL_PATTERNS):
+            return None
+        if resource_type in BLOCKED_RESOURCE_TYPES:
+            return resource_type
+        if any(pattern in url for pattern in BLOCKED_URL_PATTERNS):
+            return "tracking"
+        return None
+
+    async def _handle(self, route) -> None:
+        request = route.request
+        try:
+            reason = self._classify(request.resource_type, request.url)
+            if reason is None:
+                self.allowed += 1
+                await route.continue_()
+                return
+            self.blocked[reason] = self.blocked.get(reason, 0) + 1
+            self.estimated_bytes += ESTIMATED_BLOCKED_BYTES.get(reason, 0)
+            await route.abort()
+        except Exception:
+            # The page may already be closed; nothing left to route
+            pass
+
+    def summary(self) -> str:
+        total = sum(self.blocked.values())
+        details = ", ".join(f"{kind}={count}" for kind, count in sorted(self.blocked.items()))
+        return (f"blocked {total} requests ({details or 'none'}), allowed {self.allowed}, "
+                f"~{self.estimated_bytes / 1024 / 1024:.1f} MB saved (estimated)")
+
+class BrowserPool:
+    """Long-lived Chromium instance shared by every user job.
+
+    The browser is launched once. Contexts are created with the saved cookies,
+    handed out to one job at a time, reused for the next jobs and recycled
+    after ``recycle_after`` leases to keep memory bounded. The cookies are
+    checked before the browser starts and the login state is verified in a
+    browser only once per cookie set and SESSION_CACHE_TTL, or again after a
+    scrape reported a logged-out page.
+    """
+
+    def __init__(self, cookies_file: str = COOKIES_FILE, recycle_after: int = CONTEXT_RECYCLE_AFTER, block_resources: bool = False,
+                 allow_avatars: bool = False):
+        self.cookies_file = cookies_file
+        self.recycle_after = max(1, recycle_after)
+        self.block_resources = block_resources
+        self.allow_avatars = allow_avatars
+        self._playwright = None
+        self._browser = None
+        self._idle: List[Tuple[BrowserContext, int]] = []
+        self._uses: Dict[BrowserContext, int] = {}
+        self._blockers: Dict[BrowserContext, ResourceBlocker] = {}
+        self._start_lock = asyncio.Lock()
+        self._session_lock = asyncio.Lock()
+        self._cookies: List[Dict] = []
+        self._fingerprint = ""
+        self._session_verified = False
+        # Bumped by report_logged_out(): contexts of an older generation are not reused
+        self._generation = 0
+        self._generations: Dict[BrowserContext, int] = {}
+
+    async def __aenter__(self) -> "BrowserPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    async def start(self) -> "BrowserPool":
+        """Launch the shared browser if it is not running yet."""
+        async with self._start_lock:
+            if self._browser is not None:
+                return self
+
+            # Fail fast on missing or expired session cookies, before any browser starts
+            self._cookies, self._fingerprint = load_session_cookies(self.cookies_file)
+            self._session_verified = is_session_cached(self._fingerprint)
+            if self._session_verified:
+                print("Session validated recently, skipping login check")
+
+            # Detect if we have a display available
+            has_display = os.environ.get('DISPLAY') is not None
+
+            # Launch browser with appropriate settings
+            launch_args = [
+                '--disable-extensions',
+                '--disable-dev-shm-usage',
+                '--no-sandbox',
+                '--disable-gpu' if not has_display else '',
+            ]
+            # Remove empty strings
+            launch_args = [arg for arg in launch_args if arg]
+
+            print(f"🖥️  Display available: {has_display} (DISPLAY={os.environ.get('DISPLAY', 'None')})")
+            print(f"🚀 Browser args: {launch_args}")
+
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=not has_display,  # Headless if no display, headed if display available
+                args=launch_args
+            )
+        return self
+
+    async def close(self) -> None:
+        """Close every idle context, the browser and the Playwright driver."""
+        for context, _ in self._idle:
+            try:
+                await context.close()
+            except Exception:
+                pass
+        self._idle.clear()
+        self._uses.clear()
+        self._blockers.clear()
+        self._generations.clear()
+
+        if self._browser is not None:
+            print("\nClosing browser...")
+            await safe_browser_close(self._browser)
+            self._browser = None
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                print(f"Error stopping Playwright: {str(e)}")
+            self._playwright = None
+
+    async def _new_context(self) -> BrowserContext:
+        """Create a context with the cookies loaded, verifying the session if needed."""
+        # Create context with larger viewport and modern user agent
+        context = await self._browser.new_context(
+            viewport={'width': 1920, 'height': 1080},
+            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
+        )
+
+        try:
+            await context.add_cookies(self._cookies)
+            print("Cookies loaded successfully")
+
+            if self.block_resources:
+                blocker = ResourceBlocker(allow_avatar=self.allow_avatars)
+                await blocker.install(context)
+                self._blockers[context] = blocker
+
+            await self._verify_session(context)
+        except Exception:
+            self._blockers.pop(context, None)
+            await context.close()
+            raise
+
+        self._generations[context] = self._generation
+        return context
+
+    async def _verify_session(self, context: BrowserContext) -> None:
+        """Run the login check once per cookie set; concurrent callers wait for it."""
+        async with self._session_lock:
+            if self._session_verified:
+                return
+
+            page = await context.new_page()
+            try:
+                print("\nAccessing Twitter...")
+                await limited_goto(page, "https://twitter.com", wait_until="domcontentloaded")
+
+                # Short wait for initial load
+                await asyncio.sleep(2)
+
+                print("Verifying login status...")
+                login_verified = await verify_login(page)
+            finally:
+                await page.close()
+
+            if login_verified is False:
+                raise RuntimeError("Not logged in. Please run login_manual.py again.")
+            if login_verified is None:
+                print("Could not verify login status with any method.")
+                print("This might be due to Twitter's anti-bot measures or page loading issues.")
+                print("Attempting to continue anyway...")
+            else:
+                print("Login verified successfully")
+                cache_session(self._fingerprint)
+            self._session_verified = True
+
+    def report_logged_out(self) -> None:
+        """Called when a scrape lands on a login wall: forget the cached validation."""
+        print("Logged-out page detected, session will be re-validated")
+        invalidate_session(self._fingerprint)
+        self._session_verified = False
+        self._generation += 1
+
+    async def _discard(self, context: BrowserContext) -> None:
+        self._blockers.pop(context, None)
+        self._generations.pop(context, None)
+        try:
+            await context.close()
+        except Exception as e:
+            print(f"Error closing browser context: {str(e)}")
+
+    async def acquire(self) -> BrowserContext:
+        """Hand out an authenticated context, reusing an idle one if possible."""
+        await self.start()
+        context, uses = None, 0
+        while self._idle and context is None:
+            context, uses = self._idle.pop()
+            if self._generations.get(context) != self._generation:
+                # Opened before a logged-out page was reported: start over with a verified one
+                await self._discard(context)
+                context, uses = None, 0
+        if context is None:
+            context = await self._new_context()
+        self._uses[context] = uses
+        return context
+
+    def blocker_for(self, context: BrowserContext) -> Optional[ResourceBlocker]:
+        """Resource blocker installed on a context, if blocking is enabled."""
+        return self._blockers.get(context)
+
+    async def release(self, context: BrowserContext, healthy: bool = True) -> None:
+        """Return a context to the pool, closing it once it is worn out."""
+        uses = self._uses.pop(context, 0) + 1
+        for page in list(context.pages):
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+        current = self._generations.get(context) == self._generation
+        if healthy and current and uses < self.recycle_after and self._browser is not None:
+            self._idle.append((context, uses))
+            return
+
+        await self._discard(context)
+        print(f"Recycled browser context after {uses} leases")
+
+    @asynccontextmanager
+    async def context(self):
+        """Lease a context for the duration of a ``async with`` block."""
+        context = await self.acquire()
+        healthy = False
+        try:
+            yield context
+            healthy = True
+        finally:
+            await self.release(context, healthy)
+
+    @asynccontextmanager
+    async def page(self):
+        """Lease a context and open a single page in it."""
+        async with self.context() as context:
+            page = await context.new_page()
+            page.set_default_timeout(60000)
+            yield page
+
 async def wait_for_profile_load(page: Page, username: str) -> bool:
     """Wait for profile to load with multiple fallback strategies."""
     try:
@@ -166,415 +654,875 @@ async def wait_for_profile_load(page: Page, username: str) -> bool:
         print(f"Error waiting for profile load: {str(e)}")
         return False
 
-async def scrape_user_profile(page: Page, username: str) -> Dict[str, str]:
-    """Scrape user profile information with improved error handling."""
-    try:
-        print(f"Navigating to profile page for @{username}...")
-        await page.goto(f"https://twitter.com/{username}", wait_until="domcontentloaded", timeout=TIMEOUT)
-        await rate_limit_delay()
-        
-        if not await safe_wait_for_selector(page, 'div[data-testid="UserName"]', description="profile"):
-            print(f"Could not load profile for @{username}")
-            return {"username": username, "bio": ""}
-        
-        # Get display name with multiple selector fallbacks
-        display_name = ""
-        name_selectors = [
+# Reads the whole profile header in one page.evaluate call. The name and bio
+# selector chains are the ones the scraper used with per-element locators.
+PROFILE_HEADER_JS = """
+(username) => {
+    const text = (el) => (el && el.innerText) ? el.innerText : '';
+    const firstText = (selectors) => {
+        for (const selector of selectors) {
+            const value = text(document.querySelector(selector));
+            if (value) return value;
+        }
+        return '';
+    };
+    const countText = (suffixes) => {
+        for (const suffix of suffixes) {
+            const link = document.querySelector(`a[href$="/${suffix}" i]`);
+            if (!link) continue;
+            const span = link.querySelector('span');
+            const value = text(span) || text(link);
+            if (value) return value;
+        }
+        return '';
+    };
+    let avatar = '';
+    // Only the header photo link: UserAvatar-Container also matches the avatars in timeline tweets
+    for (const img of document.querySelectorAll(`a[href$="/${username}/photo" i] img`)) {
+        const src = img.getAttribute('src') || '';
+        if (src.includes('profile_images')) { avatar = src; break; }
+    }
+    return {
+        name: firstText([
             'div[data-testid="UserName"] span',
             'div[data-testid="UserName"] div span',
             'h1[data-testid="UserName"] span'
-        ]
-        
-        for selector in name_selectors:
-            try:
-                name_element = page.locator(selector).first
-                if await name_element.count() > 0:
-                    display_name = await name_element.inner_text()
-                    if display_name:
-                        break
-            except Exception as e:
-                print(f"Error with name selector {selector}: {str(e)}")
-                continue
-        
-        # Get bio with retry and multiple selectors
-        bio = ""
-        bio_selectors = [
+        ]),
+        bio: firstText([
             'div[data-testid="UserDescription"]',
             'div[data-testid="UserBio"]',
             'div[data-testid="UserProfessionalCategory"]'
-        ]
+        ]),
+        avatar: avatar,
+        followers: countText(['verified_followers', 'followers']),
+        following: countText(['following'])
+    };
+}
+"""
+
+def parse_count(text: str) -> Optional[int]:
+    """Parse a displayed count such as '1,234', '12.5K' or '3 M' into an int."""
+    match = re.match(r"([\d.,\s\u00a0]*\d)\s*([KMB])?", (text or "").strip(), re.IGNORECASE)
+    if not match:
+        return None
+    number, suffix = match.groups()
+    number = re.sub(r"[\s\u00a0]", "", number)
+    if suffix:
+        multiplier = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}[suffix.upper()]
+        return int(float(number.replace(",", ".")) * multiplier)
+    return int(re.sub(r"[.,]", "", number))
+
+# Size suffix of pbs.twimg.com avatars (_normal, _bigger, _200x200, ...); the
+# header shows the 200x200 rendition, the /photo page the 400x400 one
+AVATAR_SIZE_RE = re.compile(r"_(?:normal|bigger|mini|reasonably_small|\d+x\d+)(\.\w+)?$")
+
+def photo_size_avatar(url: str) -> str:
+    """The URL of the rendition get_photo_image_url() returns (``_400x400``)."""
+    base, sep, query = url.partition("?")
+    return AVATAR_SIZE_RE.sub(lambda m: "_400x400" + (m.group(1) or ""), base) + sep + query
+
+async def scrape_user_profile(page: Page, username: str, navigate: bool = True) -> Dict:
+    """Scrape user profile information with improved error handling.
+
+    With ``navigate=False`` the header is read from the profile page the
+    caller already loaded, so the profile is not fetched a second time.
+    """
+    try:
+        if navigate:
+            print(f"Navigating to profile page for @{username}...")
+            await limited_goto(page, f"https://twitter.com/{username}", wait_until="domcontentloaded", timeout=TIMEOUT)
         
+        if not await safe_wait_for_selector(page, 'div[data-testid="UserName"]', description="profile"):
+            print(f"Could not load profile for @{username}")
+            return {"username": username, "bio": ""}
+        
+        header = {}
         for attempt in range(MAX_RETRIES):
-            for selector in bio_selectors:
-                try:
-                    bio_element = page.locator(selector)
-                    if await bio_element.count() > 0:
-                        bio = await bio_element.inner_text()
-                        if bio:
-                            break
-                except Exception as e:
-                    print(f"Error with bio selector {selector}: {str(e)}")
-                    continue
-            
-            if bio:
+            try:
+                header = await page.evaluate(PROFILE_HEADER_JS, username)
+            except Exception as e:
+                print(f"Error reading profile header: {str(e)}")
+            # The bio and counts can render a moment after the name
+            if header.get("bio") and header.get("followers"):
                 break
             await rate_limit_delay()
         
-        return {
+        display_name = header.get("name", "")
+        bio = header.get("bio", "")
+        profile = {
             "username": display_name or username,
-            "bio": bio.strip() if bio else ""
+            "bio": bio.strip() if bio else "",
+            "name": display_name,
+            "followers_count": parse_count(header.get("followers", "")),
+            "following_count": parse_count(header.get("following", "")),
         }
+        if header.get("avatar"):
+            profile["profile_image_url"] = photo_size_avatar(header["avatar"])
+        return profile
 
     except Exception as e:
         print(f"Error scraping profile: {str(e)}")
         return {"username": username, "bio": ""}
 
-async def get_quoted_tweet_info(tweet_element) -> Optional[Dict[str, str]]:
-    """Get information about a quoted tweet if present"""
-    try:
-        quoted_container = tweet_element.locator('div:has(> div[data-testid="tweet"])').last
-        if await quoted_container.count() > 0:
-            quoted_text = await quoted_container.locator('div[data-testid="tweetText"]').inner_text()
-            name_element = quoted_container.locator('div[data-testid="User-Name"] div span').first
-            quoted_username = await name_element.inner_text() if await name_element.count() > 0 else ""
-            return {
-                "quoted_content": quoted_text,
-                "quoted_username": quoted_username
+# In-page extraction of every rendered tweet article. The selector fallback
+# chains mirror the ones the scraper used with per-element locators, but run
+# in a single page.evaluate call per scroll.
+EXTRACT_TWEETS_JS = """
+({ detectReposts, seen }) => {
+    const seenIds = new Set(seen);
+    const text = (el) => (el && el.innerText) ? el.innerText : '';
+    const first = (root, selector) => root.querySelector(selector);
+
+    const isVisible = (el) => {
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+    };
+
+    const tweetId = (article) => {
+        // Method 1: status ID from a link
+        for (const link of article.querySelectorAll('a[href*="/status/"]')) {
+            const href = link.getAttribute('href') || '';
+            const id = href.split('/status/').pop().split('?')[0];
+            if (/^[0-9]+$/.test(id) && id.length > 10) return id;
+        }
+        // Method 2: datetime of the time element
+        const time = first(article, 'time');
+        if (time && time.getAttribute('datetime')) return 'time_' + time.getAttribute('datetime');
+        // Method 3: data attributes
+        for (const attr of ['data-tweet-id', 'data-testid', 'data-item-id']) {
+            const value = article.getAttribute(attr);
+            if (value) return attr + '_' + value;
+        }
+        // Methods 4 and 5 (content hashes) are computed in Python
+        return null;
+    };
+
+    const mainContent = (article) => {
+        const selectors = [
+            'div[data-testid="tweetText"]',
+            'div[lang]:not([data-testid])',
+            'article div[lang]',
+            'div[role="article"] div[lang]',
+            'div[dir="auto"]:not([data-testid])',
+            'span[lang]'
+        ];
+        for (const selector of selectors) {
+            const texts = [];
+            // Limit to first 3 elements
+            for (const el of Array.from(article.querySelectorAll(selector)).slice(0, 3)) {
+                const value = text(el).trim();
+                if (value) texts.push(value);
             }
-    except Exception as e:
-        print(f"Could not get quoted tweet info: {str(e)}")
-    return None
-
-async def get_main_tweet_content(tweet_element) -> str:
-    """Get the main tweet content with improved selector robustness and timeout protection."""
-    content_selectors = [
-        'div[data-testid="tweetText"]',
-        'div[lang]:not([data-testid])',
-        'article div[lang]',
-        'div[role="article"] div[lang]',
-        'div[dir="auto"]:not([data-testid])',
-        'span[lang]'
-    ]
-    
-    for selector in content_selectors:
-        try:
-            elements = tweet_element.locator(selector)
-            count = await asyncio.wait_for(elements.count(), timeout=3)
-            if count > 0:
-                texts = []
-                for i in range(min(count, 3)):  # Limit to first 3 elements to avoid hanging
-                    try:
-                        element = elements.nth(i)
-                        text = await asyncio.wait_for(element.inner_text(), timeout=2)
-                        if text and len(text.strip()) > 0:
-                            texts.append(text.strip())
-                    except (asyncio.TimeoutError, Exception):
-                        continue
-                
-                if texts:
-                    return " ".join(texts)
-        except (asyncio.TimeoutError, Exception):
-            continue
-    
-    # Final fallback with timeout
-    try:
-        text = await asyncio.wait_for(tweet_element.inner_text(), timeout=3)
-        if text and len(text.strip()) > 10:  # Avoid getting just metadata
-            return text.strip()[:500]  # Limit length
-    except (asyncio.TimeoutError, Exception):
-        pass
-    
-    return ""
-
-async def get_tweet_date(tweet_element) -> str:
-    """Extract the date/time when the tweet was posted with timeout protection."""
-    try:
-        # Method 1: Try to get datetime from time element with timeout
-        time_element = tweet_element.locator('time').first
-        count = await asyncio.wait_for(time_element.count(), timeout=2)
-        if count > 0:
-            datetime_attr = await asyncio.wait_for(time_element.get_attribute('datetime'), timeout=2)
-            if datetime_attr:
-                return datetime_attr
-    except (asyncio.TimeoutError, Exception):
-        pass
-    
-    # Method 2: Try to get from title attribute of time element with timeout
-    try:
-        time_element = tweet_element.locator('time').first
-        count = await asyncio.wait_for(time_element.count(), timeout=2)
-        if count > 0:
-            title_attr = await asyncio.wait_for(time_element.get_attribute('title'), timeout=2)
-            if title_attr:
-                return title_attr
-    except (asyncio.TimeoutError, Exception):
-        pass
-    
-    # Method 3: Try to get text content from time element with timeout
-    try:
-        time_element = tweet_element.locator('time').first
-        count = await asyncio.wait_for(time_element.count(), timeout=2)
-        if count > 0:
-            time_text = await asyncio.wait_for(time_element.inner_text(), timeout=2)
-            if time_text:
-                return time_text.strip()
-    except (asyncio.TimeoutError, Exception):
-        pass
-    
-    # Method 4: Look for any timestamp in the tweet
-    try:
-        # Look for common date/time patterns in the tweet
-        timestamp_selectors = [
+            if (texts.length) return texts.join(' ');
+        }
+        // Final fallback, avoid returning just metadata
+        const all = text(article).trim();
+        return all.length > 10 ? all.slice(0, 500) : '';
+    };
+
+    const tweetDate = (article) => {
+        const fromElement = (el) => el.getAttribute('datetime') || el.getAttribute('title') || text(el).trim();
+        const time = first(article, 'time');
+        if (time) {
+            const value = fromElement(time);
+            if (value) return value;
+        }
+        const selectors = [
             'a[href*="/status/"] time',
             'time[datetime]',
             '[data-testid*="time"]',
             '[aria-label*="time"]',
             '[title*="AM"]',
             '[title*="PM"]'
-        ]
-        
-        for selector in timestamp_selectors:
-            try:
-                element = tweet_element.locator(selector).first
-                if await element.count() > 0:
-                    # Try datetime attribute first
-                    datetime_attr = await element.get_attribute('datetime')
-                    if datetime_attr:
-                        return datetime_attr
-                    
-                    # Try title attribute
-                    title_attr = await element.get_attribute('title')
-                    if title_attr:
-                        return title_attr
-                    
-                    # Try text content
-                    text = await element.inner_text()
-                    if text:
-                        return text.strip()
-            except Exception:
-                continue
-    except Exception:
-        pass
-    
-    return ""
+        ];
+        for (const selector of selectors) {
+            const el = first(article, selector);
+            if (el) {
+                const value = fromElement(el);
+                if (value) return value;
+            }
+        }
+        return '';
+    };
+
+    const isRepost = (article) => {
+        // Method 1: retweet indicator in social context
+        for (const selector of ['div[data-testid="socialContext"]', 'div[data-testid="tweet"] div[data-testid="socialContext"]']) {
+            const social = text(first(article, selector)).toLowerCase();
+            if (['reposted', 'retweeted', 'retweet', 'shared'].some((word) => social.includes(word))) return true;
+        }
+        // Method 2: retweet icon/action
+        const indicators = [
+            'div[data-testid="retweetIcon"]',
+            'div[data-testid="retweet"]',
+            'div[aria-label*="retweet" i]',
+            'div[aria-label*="repost" i]',
+            'svg[data-testid="icon-retweet"]'
+        ];
+        if (indicators.some((selector) => first(article, selector))) return true;
+        // Method 3: retweet text patterns
+        const articleText = text(article).toLowerCase();
+        const phrases = ['retweeted', 'reposted', 'retweet', 'shared this', 'reposted this', 'retweeted this', 'shared a'];
+        if (phrases.some((phrase) => articleText.includes(phrase))) return true;
+        // Method 4: nested tweet structure
+        return ['div[data-testid="tweet"] div[data-testid="tweet"]', 'article div[data-testid="tweet"]']
+            .some((selector) => first(article, selector));
+    };
+
+    const author = (article) => {
+        const candidates = [
+            Array.from(article.querySelectorAll('div[data-testid="User-Name"] a')),
+            Array.from(article.querySelectorAll('div[data-testid="User-Name"] span')).filter((el) => text(el).includes('@')),
+            Array.from(article.querySelectorAll('a[href*="/"]:not([href*="/status/"])'))
+        ];
+        for (const elements of candidates) {
+            // Limit to first 5 elements
+            for (const el of elements.slice(0, 5)) {
+                const href = el.getAttribute('href');
+                if (href && href.includes('/') && !href.includes('/status/')) {
+                    const parts = href.replace(/^\\/+|\\/+$/g, '').split('/');
+                    const name = parts[parts.length - 1];
+                    if (name && !name.startsWith('http')) return name;
+                }
+                const value = text(el);
+                if (value.includes('@')) {
+                    const name = value.replace(/^@+|@+$/g, '').trim().split(/\\s+/)[0];
+                    if (name) return name;
+                }
+            }
+        }
+        return '';
+    };
+
+    const quoted = (article) => {
+        const containers = article.querySelectorAll('div:has(> div[data-testid="tweet"])');
+        const container = containers[containers.length - 1];
+        if (!container) return null;
+        const texts = container.querySelectorAll('div[data-testid="tweetText"]');
+        if (texts.length !== 1) return null;
+        const name = first(container, 'div[data-testid="User-Name"] div span');
+        return { content: text(texts[0]), username: text(name) };
+    };
+
+    const entries = [];
+    for (const article of document.querySelectorAll('article[data-testid="tweet"]')) {
+        // Skip invisible tweets
+        if (!isVisible(article)) continue;
+        const id = tweetId(article);
+        if (id && seenIds.has(id)) {
+            entries.push({ id, seen: true });
+            continue;
+        }
+        const reposted = detectReposts ? isRepost(article) : false;
+        const quote = quoted(article);
+        entries.push({
+            id,
+            html: id ? null : article.innerHTML.slice(0, 1000),
+            text: id ? null : text(article).trim(),
+            content: mainContent(article),
+            date: tweetDate(article),
+            is_repost: reposted,
+            author: reposted ? author(article) : '',
+            quoted_content: quote ? quote.content : null,
+            quoted_username: quote ? quote.username : null,
+            pinned: /pinned/i.test(text(first(article, 'div[data-testid="socialContext"]')))
+        });
+    }
+    return entries;
+}
+"""
 
-async def get_tweet_id(tweet_element) -> str:
-    """Get a unique identifier for a tweet with improved robustness."""
-    # Method 1: Try to get tweet status ID from URL
+async def extract_visible_tweets(page: Page, detect_reposts: bool, seen: Set[str]) -> List[Dict]:
+    """Extract every visible tweet article with a single ``page.evaluate`` call.
+
+    Returns normalized timeline entries; articles whose ID is already in
+    ``seen`` only carry their ``id``. Entries without any usable ID are
+    dropped.
+    """
     try:
-        links = tweet_element.locator('a[href*="/status/"]')
-        count = await links.count()
-        for i in range(count):
-            try:
-                href = await links.nth(i).get_attribute('href')
-                if href and "/status/" in href:
-                    tweet_id = href.split('/status/')[-1].split('?')[0]
-                    if tweet_id.isdigit() and len(tweet_id) > 10:
-                        return tweet_id
-            except Exception:
+        raw_entries = await asyncio.wait_for(
+            page.evaluate(EXTRACT_TWEETS_JS, {"detectReposts": detect_reposts, "seen": list(seen)}),
+            timeout=10
+        )
+    except (asyncio.TimeoutError, Exception) as e:
+        print(f"[DEBUG] Timeout/error extracting tweet articles: {str(e)}")
+        return []
+
+    entries = []
+    for entry in raw_entries:
+        if not entry.get("id"):
+            # Method 4: generate from content hash (first 1000 chars of HTML)
+            if entry.get("html"):
+                entry["id"] = f"hash_{hashlib.md5(entry['html'].encode()).hexdigest()}"
+            # Method 5: hash of the first 100 chars of text
+            elif entry.get("text") and len(entry["text"]) > 5:
+                entry["id"] = f"stable_{hashlib.md5(entry['text'][:100].encode()).hexdigest()[:12]}"
+            else:
                 continue
-    except Exception:
-        pass
-    
-    # Method 2: Try to get datetime from time element
-    try:
-        time_element = tweet_element.locator('time').first
-        if await time_element.count() > 0:
-            datetime_attr = await time_element.get_attribute('datetime')
-            if datetime_attr:
-                return f"time_{datetime_attr}"
-    except Exception:
-        pass
-    
-    # Method 3: Try to get data attributes
-    try:
-        data_attrs = ['data-tweet-id', 'data-testid', 'data-item-id']
-        for attr in data_attrs:
-            value = await tweet_element.get_attribute(attr)
-            if value:
-                return f"{attr}_{value}"
-    except Exception:
-        pass
-    
-    # Method 4: Generate from content hash
-    try:
-        # Get a small portion of HTML for hashing (avoid memory issues)
-        html_snippet = await tweet_element.inner_html()
-        if html_snippet:
-            # Take first 1000 chars to avoid memory issues
-            content_hash = hashlib.md5(html_snippet[:1000].encode()).hexdigest()
-            return f"hash_{content_hash}"
-    except Exception:
-        pass
-    
-    # Method 5: Last resort - use element position and content snippet hash
+            if entry["id"] in seen:
+                entry = {"id": entry["id"], "seen": True}
+        entry.pop("html", None)
+        entry.pop("text", None)
+        entries.append(entry)
+    return entries
+
+def format_graphql_date(created_at: str) -> str:
+    """Convert a GraphQL ``created_at`` value to the ISO format the DOM exposes."""
     try:
-        # Create a more stable ID based on element properties
-        element_text = await tweet_element.inner_text()
-        if element_text and len(element_text.strip()) > 5:
-            # Use first 100 chars of text to create stable hash
-            text_snippet = element_text.strip()[:100]
-            content_hash = hashlib.md5(text_snippet.encode()).hexdigest()[:12]
-            return f"stable_{content_hash}"
-    except Exception:
-        pass
-    
-    # If we reach here, the element probably has no useful content
-    # Return None to indicate this element should be skipped
+        parsed = datetime.strptime(created_at, GRAPHQL_DATE_FORMAT)
+        return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+    except (TypeError, ValueError):
+        return created_at or "Unknown"
+
+def _graphql_result(container: Optional[Dict]) -> Dict:
+    """Unwrap ``{"result": ...}`` containers, including visibility wrappers."""
+    result = (container or {}).get("result") or {}
+    if result.get("__typename") == "TweetWithVisibilityResults":
+        result = result.get("tweet") or {}
+    return result
+
+def _graphql_user_fields(user_result: Dict) -> Tuple[str, str, str]:
+    """Return (screen_name, display name, bio) for a GraphQL user result."""
+    legacy = user_result.get("legacy") or {}
+    core = user_result.get("core") or {}
+    screen_name = core.get("screen_name") or legacy.get("screen_name") or ""
+    name = core.get("name") or legacy.get("name") or ""
+    bio = legacy.get("description") or ((user_result.get("profile_bio") or {}).get("description")) or ""
+    return screen_name, name, bio
+
+def _graphql_tweet_text(tweet: Dict) -> str:
+    """Full tweet text, preferring the untruncated note text of long tweets."""
+    note = _graphql_result((tweet.get("note_tweet") or {}).get("note_tweet_results"))
+    text = note.get("text") or (tweet.get("legacy") or {}).get("full_text") or ""
+    return text.strip()
+
+def _graphql_instructions(payload) -> List[Dict]:
+    """Find the timeline instruction list wherever the operation nests it."""
+    if isinstance(payload, dict):
+        instructions = payload.get("instructions")
+        if isinstance(instructions, list):
+            return instructions
+        for value in payload.values():
+            found = _graphql_instructions(value)
+            if found:
+                return found
+    elif isinstance(payload, list):
+        for value in payload:
+            found = _graphql_instructions(value)
+            if found:
+                return found
+    return []
+
+def _graphql_item_contents(payload) -> List[Tuple[Dict, bool]]:
+    """Flatten timeline instructions into (itemContent, pinned) pairs in display order."""
+    contents = []
+    for instruction in _graphql_instructions(payload):
+        pinned = instruction.get("type") == "TimelinePinEntry"
+        entries = instruction.get("entries") or ([instruction["entry"]] if instruction.get("entry") else [])
+        for entry in entries:
+            content = entry.get("content") or {}
+            if content.get("itemContent"):
+                contents.append((content["itemContent"], pinned))
+            for item in content.get("items") or []:
+                item_content = (item.get("item") or {}).get("itemContent")
+                if item_content:
+                    contents.append((item_content, pinned))
+    return contents
+
+def parse_timeline_payload(payload: Dict) -> List[Dict]:
+    """Turn a ``UserTweets`` response into normalized timeline entries.
+
+    Entries have the same keys as the DOM extraction: id, date, content,
+    is_repost, author, quoted_content, quoted_username and pinned.
+    """
+    entries = []
+    for item_content, pinned in _graphql_item_contents(payload):
+        if item_content.get("promotedMetadata"):
+            continue
+        tweet = _graphql_result(item_content.get("tweet_results"))
+        legacy = tweet.get("legacy")
+        if not legacy:
+            continue
+
+        entry = {
+            "id": tweet.get("rest_id") or legacy.get("id_str"),
+            "date": format_graphql_date(legacy.get("created_at")),
+            "content": _graphql_tweet_text(tweet),
+            "is_repost": False,
+            "author": _graphql_user_fields(_graphql_result((tweet.get("core") or {}).get("user_results")))[0],
+            "quoted_content": None,
+            "quoted_username": None,
+            "pinned": pinned,
+        }
+
+        original = _graphql_result(legacy.get("retweeted_status_result"))
+        if original.get("legacy"):
+            entry["is_repost"] = True
+            entry["content"] = _graphql_tweet_text(original)
+            entry["date"] = format_graphql_date(original["legacy"].get("created_at"))
+            entry["author"] = _graphql_user_fields(_graphql_result((original.get("core") or {}).get("user_results")))[0]
+
+        quoted = _graphql_result((original if entry["is_repost"] else tweet).get("quoted_status_result"))
+        if quoted.get("legacy"):
+            _, quoted_name, _ = _graphql_user_fields(_graphql_result((quoted.get("core") or {}).get("user_results")))
+            entry["quoted_content"] = _graphql_tweet_text(quoted)
+            entry["quoted_username"] = quoted_name
+
+        entries.append(entry)
+    return entries
+
+def parse_social_payload(payload: Dict) -> List[Dict[str, str]]:
+    """Turn a ``Followers``/``Following`` response into username/name/bio records."""
+    users = []
+    for item_content, _ in _graphql_item_contents(payload):
+        user = _graphql_result(item_content.get("user_results"))
+        if not user:
+            continue
+        screen_name, name, bio = _graphql_user_fields(user)
+        if screen_name:
+            users.append({"username": screen_name, "name": name, "bio": bio.strip()})
+    return users
+
+def graphql_bottom_cursor(payload: Dict) -> Optional[str]:
+    """The cursor that requests the page after this response, if any."""
+    for instruction in _graphql_instructions(payload):
+        entries = instruction.get("entries") or ([instruction["entry"]] if instruction.get("entry") else [])
+        for entry in entries:
+            content = entry.get("content") or {}
+            if content.get("cursorType") == "Bottom" and content.get("value"):
+                return content["value"]
     return None
 
-async def is_repost(tweet_element) -> bool:
-    """Check if tweet is a repost (retweet without comment) with improved detection."""
-    try:
-        # Method 1: Check for retweet indicator in social context
-        social_selectors = [
-            'div[data-testid="socialContext"]',
-            'div[data-testid="tweet"] div[data-testid="socialContext"]'
-        ]
-        
-        for selector in social_selectors:
-            try:
-                social_context = tweet_element.locator(selector)
-                if await social_context.count() > 0:
-                    social_text = await social_context.inner_text()
-                    retweet_indicators = ["reposted", "retweeted", "retweet", "shared"]
-                    if any(indicator in social_text.lower() for indicator in retweet_indicators):
-                        print(f"Found retweet via social context: {social_text}")
-                        return True
-            except Exception:
-                continue
+async def resume_at_cursor(page: Page, operations: Tuple[str, ...], cursor: str) -> None:
+    """Make the next matching GraphQL request of ``page`` start at ``cursor``.
+
+    Used to resume a timeline or follower list from a checkpoint: the first
+    request the page sends is rewritten to ask for the saved page instead of
+    the top of the list.
+    """
+    async def handle(route):
+        request = route.request
+        operation = request.url.split("/graphql/", 1)[1].split("?", 1)[0].rsplit("/", 1)[-1]
+        if operation not in operations:
+            await route.fallback()
+            return
+        await page.unroute("**/graphql/**", handle)
+        parts = urlsplit(request.url)
+        query = dict(parse_qsl(parts.query))
+        try:
+            variables = json.loads(query.get("variables", "{}"))
+            variables["cursor"] = cursor
+            query["variables"] = json.dumps(variables, separators=(",", ":"))
+            print(f"[DEBUG] Resuming {operation} from checkpoint cursor")
+            await route.fallback(url=parts._replace(query=urlencode(query)).geturl())
+        except Exception as e:
+            print(f"Could not apply checkpoint cursor: {str(e)}")
+            await route.fallback()
+
+    await page.route("**/graphql/**", handle)
+
+class GraphQLCapture:
+    """Collects parsed records from X's GraphQL responses received by a page.
+
+    Attach it before navigating so the first page of results is not missed,
+    call ``drain()`` after each scroll and ``detach()`` when done.
+    """
+
+    def __init__(self, page: Page, operations: Tuple[str, ...], parser):
+        self.page = page
+        self.operations = operations
+        self.parser = parser
+        self.payloads = 0
+        self.cursor: Optional[str] = None  # bottom cursor of the latest response
+        self._records: List[Dict] = []
+        self._arrived = asyncio.Event()
+        page.on("response", self._on_response)
+
+    @property
+    def has_payload(self) -> bool:
+        return self.payloads > 0
+
+    async def _on_response(self, response) -> None:
+        url = response.url
+        if "/graphql/" not in url:
+            return
+        if response.status == 429:
+            RATE_LIMITER.on_throttle("HTTP 429 on GraphQL request")
+            return
+        operation = url.split("/graphql/", 1)[1].split("?", 1)[0].rsplit("/", 1)[-1]
+        if operation not in self.operations:
+            return
+        try:
+            payload = await response.json()
+            records = self.parser(payload)
+            self.cursor = graphql_bottom_cursor(payload) or self.cursor
+        except Exception as e:
+            print(f"[DEBUG] Could not parse {operation} response: {str(e)}")
+            return
+        self.payloads += 1
+        self._records.extend(records)
+        self._arrived.set()
+        print(f"[DEBUG] Captured {len(records)} records from {operation} response")
+
+    async def wait_for_payload(self, seen: int) -> bool:
+        """Wait until more than ``seen`` payloads have been parsed."""
+        while self.payloads <= seen:
+            self._arrived.clear()
+            await self._arrived.wait()
+        return True
 
-        # Method 2: Check for retweet icon/action
-        retweet_indicators = [
-            'div[data-testid="retweetIcon"]',
-            'div[data-testid="retweet"]',
-            'div[aria-label*="retweet" i]',
-            'div[aria-label*="repost" i]',
-            'svg[data-testid="icon-retweet"]'
-        ]
-        
-        for indicator in retweet_indicators:
-            try:
-                element = tweet_element.locator(indicator)
-                if await element.count() > 0:
-                    print(f"Found retweet via indicator: {indicator}")
-                    return True
-            except Exception:
-                continue
+    def drain(self) -> List[Dict]:
+        """Return the records captured since the previous call."""
+        records, self._records = self._records, []
+        return records
 
-        # Method 3: Check for retweet text patterns
+    def detach(self) -> None:
         try:
-            article_text = await tweet_element.inner_text()
-            if article_text:
-                retweet_phrases = [
-                    "retweeted", "reposted", "retweet", "shared this",
-                    "reposted this", "retweeted this", "shared a"
-                ]
-                for phrase in retweet_phrases:
-                    if phrase in article_text.lower():
-                        print(f"Found retweet via text pattern: {phrase}")
-                        return True
+            self.page.remove_listener("response", self._on_response)
         except Exception:
             pass
 
-        # Method 4: Check for nested tweet structure
+# Scrolls the page, then resolves as soon as a node matching the item
+# selector is added (or the ceiling timeout expires).
+SCROLL_AND_WAIT_JS = """
+async ({ selector, toBottom, timeoutMs, throttleTexts }) => {
+    const started = performance.now();
+    const appeared = new Promise((resolve) => {
+        const observer = new MutationObserver((mutations) => {
+            for (const mutation of mutations) {
+                for (const node of mutation.addedNodes) {
+                    if (node.nodeType === 1 && (node.matches(selector) || node.querySelector(selector))) {
+                        observer.disconnect();
+                        resolve(true);
+                        return;
+                    }
+                }
+            }
+        });
+        observer.observe(document.body, { childList: true, subtree: true });
+        setTimeout(() => { observer.disconnect(); resolve(false); }, timeoutMs);
+    });
+    if (toBottom) {
+        window.scrollTo(0, document.body.scrollHeight);
+    } else {
+        // Gentle scroll, at most 800px so no tweets are skipped
+        window.scrollBy(0, Math.min(window.innerHeight, 800));
+    }
+    const grew = await appeared;
+    // "Something went wrong" / "Try reloading" states mean X is throttling us
+    const column = document.querySelector('div[data-testid="primaryColumn"]');
+    const columnText = column ? column.innerText : '';
+    const throttled = !grew && throttleTexts.some((value) => columnText.includes(value));
+    return { grew, throttled, elapsedMs: performance.now() - started, scrollY: window.scrollY };
+}
+"""
+
+class ScrollDriver:
+    """Scrolls a timeline and waits for the next batch of items to arrive.
+
+    A scroll is settled as soon as a new item node is rendered or, when a
+    GraphQLCapture is given, a new matching response is parsed. The
+    ``settle_timeout`` is only reached when nothing new shows up, e.g. at
+    the end of the list.
+    """
+
+    def __init__(self, page: Page, item_selector: str, capture: Optional[GraphQLCapture] = None, settle_timeout: float = SCROLL_SETTLE_TIMEOUT):
+        self.page = page
+        self.item_selector = item_selector
+        self.capture = capture
+        self.settle_timeout = settle_timeout
+        self.settle_times: List[float] = []
+        self.timeouts = 0
+        self.scroll_y = 0
+
+    async def scroll(self, to_bottom: bool = False) -> bool:
+        """Scroll once and wait for new content. Returns True if anything arrived."""
+        await RATE_LIMITER.acquire()
+        started = time.monotonic()
+        waiters = [asyncio.ensure_future(self.page.evaluate(SCROLL_AND_WAIT_JS, {
+            "selector": self.item_selector,
+            "toBottom": to_bottom,
+            "timeoutMs": int(self.settle_timeout * 1000),
+            "throttleTexts": list(THROTTLE_TEXTS),
+        }))]
+        if self.capture is not None:
+            waiters.append(asyncio.ensure_future(self.capture.wait_for_payload(self.capture.payloads)))
+
+        settled = False
+        throttled = False
+        pending = set(waiters)
         try:
-            # Look for quoted or nested tweets
-            nested_selectors = [
-                'div[data-testid="tweet"] div[data-testid="tweet"]',
-                'article div[data-testid="tweet"]'
-            ]
-            
-            for selector in nested_selectors:
-                nested_tweet = tweet_element.locator(selector)
-                if await nested_tweet.count() > 0:
-                    print("Found retweet via nested structure")
-                    return True
-        except Exception:
+            while pending and not settled:
+                done, pending = await asyncio.wait(pending, timeout=self.settle_timeout + 2, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    try:
+                        outcome = task.result()
+                    except Exception as e:
+                        print(f"Scroll operation error: {str(e)}")
+                        continue
+                    if isinstance(outcome, dict):
+                        self.scroll_y = outcome.get("scrollY", self.scroll_y)
+                        throttled = throttled or outcome.get("throttled", False)
+                        settled = settled or outcome["grew"]
+                    else:
+                        settled = settled or bool(outcome)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        elapsed = time.monotonic() - started
+        self.settle_times.append(elapsed)
+        if throttled:
+            RATE_LIMITER.on_throttle("error state in timeline")
+        elif settled:
+            RATE_LIMITER.on_success()
+
+        if settled:
+            print(f"[DEBUG] Scroll settled in {elapsed:.2f}s")
+        else:
+            self.timeouts += 1
+            print(f"[DEBUG] No new content {elapsed:.2f}s after scrolling")
+        return settled
+
+    async def fast_forward(self, target_y: int, max_scrolls: int = 50) -> None:
+        """Scroll to the bottom until ``target_y`` is reached, e.g. a checkpoint position."""
+        print(f"Fast-forwarding to checkpoint scroll position {target_y}px...")
+        for _ in range(max_scrolls):
+            if self.scroll_y >= target_y or not await self.scroll(to_bottom=True):
+                break
+
+    def summary(self) -> str:
+        if not self.settle_times:
+            return "no scrolls"
+        average = sum(self.settle_times) / len(self.settle_times)
+        return (f"{len(self.settle_times)} scrolls, avg {average:.2f}s, max {max(self.settle_times):.2f}s, "
+                f"{self.timeouts} without new content")
+
+class UserCheckpoint:
+    """Partial per-user state, written periodically while a user is scraped.
+
+    Each section ("timeline", "followers", "following") stores its items,
+    processed IDs, last GraphQL cursor and scroll position. A restarted job
+    loads the checkpoint, skips finished sections and continues the others.
+    """
+
+    def __init__(self, username: str, folder: str = CHECKPOINT_DIR):
+        self.path = os.path.join(folder, f"{username}.json")
+        self.state = {"username": username, "sections": {}}
+        self._last_write: Dict[str, float] = {}
+        try:
+            if time.time() - os.path.getmtime(self.path) < CHECKPOINT_MAX_AGE:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.state = json.load(f)
+                print(f"Resuming @{username} from checkpoint ({', '.join(self.state['sections']) or 'empty'})")
+        except (OSError, ValueError, KeyError):
             pass
 
-    except Exception as e:
-        print(f"Error checking repost status: {str(e)}")
-    
-    return False
+    @staticmethod
+    def exists(username: str, folder: str = CHECKPOINT_DIR) -> bool:
+        """True if a recent, unfinished checkpoint is waiting to be resumed."""
+        try:
+            return time.time() - os.path.getmtime(os.path.join(folder, f"{username}.json")) < CHECKPOINT_MAX_AGE
+        except OSError:
+            return False
 
-async def get_retweet_info(tweet_element, page: Page) -> Optional[Dict[str, str]]:
-    """Get information about a retweet WITHOUT bio fetching (to prevent hanging)."""
-    try:
-        # Get the original tweet content
-        main_content = await get_main_tweet_content(tweet_element)
-        
-        # Get username of original tweet author
-        username = ""
-        username_selectors = [
-            'div[data-testid="User-Name"] a',
-            'div[data-testid="User-Name"] span:has-text("@")',
-            'a[href*="/"]:not([href*="/status/"])'
-        ]
-        
-        for selector in username_selectors:
-            try:
-                # Add timeout protection for element counting and access
-                elements = tweet_element.locator(selector)
-                count = await asyncio.wait_for(elements.count(), timeout=3)
-                
-                for i in range(min(count, 5)):  # Limit to first 5 elements
-                    try:
-                        element = elements.nth(i)
-                        
-                        # Try to get username from href with timeout
-                        try:
-                            href = await asyncio.wait_for(element.get_attribute('href'), timeout=2)
-                            if href and '/' in href and not '/status/' in href:
-                                potential_username = href.strip('/').split('/')[-1]
-                                if potential_username and not potential_username.startswith('http'):
-                                    username = potential_username
-                                    break
-                        except (asyncio.TimeoutError, Exception):
-                            pass
-                        
-                        # Try to get username from text content with timeout
-                        try:
-                            text = await asyncio.wait_for(element.inner_text(), timeout=2)
-                            if text and '@' in text:
-                                username = text.strip('@').split()[0]
-                                break
-                        except (asyncio.TimeoutError, Exception):
-                            pass
-                            
-                    except Exception:
-                        continue
-                        
-                if username:
-                    break
-            except (asyncio.TimeoutError, Exception) as e:
-                print(f"Timeout/error in username extraction with selector {selector}: {str(e)}")
-                continue
+    def finished(self, sections: List[str]) -> bool:
+        return all(self.section(name).get("done") for name in sections)
+
+    def section(self, name: str) -> Dict:
+        return self.state["sections"].get(name, {})
+
+    def update(self, name: str, force: bool = False, **state) -> None:
+        """Store the state of a section; written at most every CHECKPOINT_INTERVAL seconds."""
+        self.state["sections"][name] = state
+        if force or time.monotonic() - self._last_write.get(name, 0.0) >= CHECKPOINT_INTERVAL:
+            self._last_write[name] = time.monotonic()
+            self.save()
+
+    def complete(self, name: str, **state) -> None:
+        self.update(name, force=True, done=True, **state)
 
-        # NO BIO FETCHING - leave empty as requested
-        bio = ""
-        print(f"Skipped bio fetching for @{username} (disabled to prevent hanging)")
+    def save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error writing checkpoint: {str(e)}")
+
+    def clear(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
 
-        return {
+class JsonlWriter:
+    """Appends scraped records to a JSONL file as soon as they are extracted.
+
+    Every line is one record tagged with ``user`` and ``type`` (profile,
+    tweet, retweet, follower, following or summary) and is flushed right
+    away, so other jobs can tail the file while the crawl is running.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self._file = open(path, "a", encoding="utf-8")
+
+    def write(self, username: str, record_type: str, record: Dict) -> None:
+        line = {"user": username, "type": record_type, **record}
+        self._file.write(json.dumps(line, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.records += 1
+
+    def for_user(self, username: str):
+        """An ``on_record(record_type, record)`` callback bound to one user."""
+        return lambda record_type, record: self.write(username, record_type, record)
+
+    def write_summary(self, username: str, result: Dict, ok: bool) -> None:
+        self.write(username, "summary", {
+            "ok": ok,
+            "user_profile": result.get("user_profile", {}),
+            "profile_image_url": result.get("profile_image_url"),
+            "tweets": len(result.get("tweets", [])),
+            "retweets": len(result.get("retweets", [])),
+            "followers": len(result.get("followers", [])),
+            "following": len(result.get("following", [])),
+            "unavailable": result.get("unavailable"),
+            "finished_at": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        })
+
+    def close(self) -> None:
+        self._file.close()
+
+async def emit_record(on_record, record_type: str, record: Dict) -> None:
+    """Pass a record to an optional sync or async ``on_record`` callback."""
+    if on_record is None:
+        return
+    outcome = on_record(record_type, record)
+    if inspect.isawaitable(outcome):
+        await outcome
+
+def add_timeline_entry(entry: Dict, tweets: List[Dict[str, str]], retweets: List[Dict[str, str]], max_tweets: int, max_retweets: int, stop_date=None) -> bool:
+    """Append a normalized timeline entry to ``tweets`` or ``retweets``.
+
+    Returns True when the entry is on or before ``stop_date`` and scraping
+    should stop.
+    """
+    if entry["is_repost"] and max_retweets > 0:
+        if len(retweets) >= max_retweets:
+            print(f"Reached maximum retweets limit ({max_retweets}), skipping further retweets")
+            return False
+        retweets.append({
             "retweet_content": "",  # Pure retweets have no additional content
-            "retweet_username": username,
-            "retweet_profile_bio": bio,  # Always empty - no bio fetching
-            "retweet_main_content": main_content
-        }
+            "retweet_username": entry.get("author") or "",
+            "retweet_profile_bio": "",  # Always empty - no bio fetching
+            "retweet_main_content": entry.get("content") or "",
+            "retweet_date": entry.get("date") or "Unknown"
+        })
+        print(f"Successfully added retweet {len(retweets)} with date: {entry.get('date')}")
+        return False
 
-    except Exception as e:
-        print(f"Could not get retweet info: {str(e)}")
-        return None
+    if len(tweets) >= max_tweets:
+        print(f"Reached maximum tweets limit ({max_tweets}), skipping further tweets")
+        return False
 
-async def scrape_tweets(page: Page, username: str, max_tweets: int = 100, max_retweets: int = 100, stop_date=None) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
-    """Scrape tweets and retweets with improved efficiency and error handling."""
-    tweets = []
-    retweets = []
-    processed_ids: Set[str] = set()
+    if not entry.get("content"):
+        print(f"Tweet {entry.get('id')} has no detectable content, skipping")
+        return False
+
+    tweet_date = entry.get("date") or "Unknown"
+    if should_stop_at_date(tweet_date, stop_date):
+        print(f"Stopping scraping with {len(tweets)} tweets collected.")
+        return True
+
+    tweet_data = {
+        "tweet_content": entry["content"],
+        "tweet_date": tweet_date
+    }
+    if entry.get("quoted_content") is not None:
+        tweet_data["quoted_content"] = entry["quoted_content"]
+        tweet_data["quoted_username"] = entry.get("quoted_username") or ""
+
+    tweets.append(tweet_data)
+    print(f"Successfully added tweet {len(tweets)} with date: {tweet_date}")
+    return False
+
+def is_known_tweet(tweet_id: str, tweet_date: str, high_water_mark: Optional[Dict]) -> bool:
+    """True if a tweet is not newer than the high-water mark of a previous run.
+
+    Status IDs are compared numerically (they grow with time); entries that
+    only have a fallback ID are compared by date.
+    """
+    if not high_water_mark:
+        return False
+    known_id = str(high_water_mark.get("tweet_id") or "")
+    if tweet_id.isdigit() and known_id.isdigit():
+        return int(tweet_id) <= int(known_id)
+    known_date = parse_tweet_date(high_water_mark.get("tweet_date") or "")
+    current_date = parse_tweet_date(tweet_date or "")
+    return bool(known_date and current_date and current_date < known_date)
+
+def advance_high_water_mark(high_water_mark: Dict, tweet_id: str, tweet_date: str) -> None:
+    """Record a tweet in ``high_water_mark`` if it is the newest seen so far."""
+    known_id = str(high_water_mark.get("tweet_id") or "")
+    if not known_id or (tweet_id.isdigit() and (not known_id.isdigit() or int(tweet_id) > int(known_id))):
+        high_water_mark["tweet_id"] = tweet_id
+        high_water_mark["tweet_date"] = tweet_date or "Unknown"
+
+def merge_history(new_items: List[Dict], old_items: List[Dict], content_key: str, date_key: str) -> List[Dict]:
+    """New items first, followed by stored items not seen again in this run."""
+    merged = list(new_items)
+    seen = {(item.get(content_key), item.get(date_key)) for item in new_items}
+    for item in old_items:
+        key = (item.get(content_key), item.get(date_key))
+        if key not in seen:
+            seen.add(key)
+            merged.append(item)
+    return merged
+
+async def scrape_tweets(page: Page, username: str, max_tweets: int = 100, max_retweets: int = 100, stop_date=None, capture: Optional["GraphQLCapture"] = None, high_water_mark: Optional[Dict] = None, checkpoint: Optional[UserCheckpoint] = None, on_record=None) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """Scrape tweets and retweets with improved efficiency and error handling.
+
+    When ``capture`` is given, it was attached before the caller loaded the
+    profile on ``page``: the timeline continues from that page instead of
+    navigating to the profile again.
+
+    ``high_water_mark`` (``{"tweet_id", "tweet_date"}`` of the newest tweet of a
+    previous run) makes scraping stop at the first already-known tweet. The
+    dict is updated in place with the newest tweet seen in this run.
+
+    With a ``checkpoint``, progress is saved periodically under "timeline"
+    and a saved state is resumed: collected items and processed IDs are
+    restored and the timeline continues from the saved cursor (or scroll
+    position). When ``capture`` is given, the caller installs the cursor
+    with ``resume_at_cursor`` before its navigation.
+
+    ``on_record(record_type, record)`` is called with every tweet or retweet
+    as soon as it is added (items restored from a checkpoint are not repeated);
+    if it returns an awaitable, scrolling waits for it.
+    """
+    known_mark = dict(high_water_mark) if high_water_mark else None
+    saved = checkpoint.section("timeline") if checkpoint else {}
+    tweets = saved.get("tweets", [])
+    retweets = saved.get("retweets", [])
+    processed_ids: Set[str] = set(saved.get("processed_ids", []))
+    if high_water_mark is not None and saved.get("high_water_mark"):
+        high_water_mark.update(saved["high_water_mark"])
     
     # Initialize scroll_attempts at the beginning to avoid variable scope issues
     scroll_attempts = 0
     max_scroll_attempts = 50
+    driver = None
+
+    navigate = capture is None
+    if navigate:
+        # Listen for UserTweets responses before navigating so the first batch is captured
+        capture = GraphQLCapture(page, GRAPHQL_TIMELINE_OPERATIONS, parse_timeline_payload)
     
     try:
         print(f"\nStarting to scrape tweets for user: {username} (max {max_tweets} tweets, {max_retweets} retweets)")
@@ -585,8 +1533,10 @@ async def scrape_tweets(page: Page, username: str, max_tweets: int = 100, max_re
         
         # Screenshots disabled for better performance
         
-        # Navigate to profile
-        await page.goto(f"https://twitter.com/{username}", wait_until="domcontentloaded", timeout=TIMEOUT)
+        if navigate:
+            if saved.get("cursor"):
+                await resume_at_cursor(page, GRAPHQL_TIMELINE_OPERATIONS, saved["cursor"])
+            await limited_goto(page, f"https://twitter.com/{username}", wait_until="domcontentloaded", timeout=TIMEOUT)
         
         if not await wait_for_profile_load(page, username):
             print("Profile could not be loaded")
@@ -595,219 +1545,87 @@ async def scrape_tweets(page: Page, username: str, max_tweets: int = 100, max_re
         print("Profile loaded successfully")
         
         # Scrolling variables
-        last_height = await page.evaluate("document.body.scrollHeight")
+        driver = ScrollDriver(page, 'article[data-testid="tweet"]', capture)
+        if saved:
+            print(f"Restored {len(tweets)} tweets and {len(retweets)} retweets from checkpoint")
+            if not saved.get("cursor") and saved.get("scroll_y"):
+                await driver.fast_forward(saved["scroll_y"])
         no_new_items_count = 0
         max_no_new_items = 3  # Restored from 2 to 3
+        # The high-water mark must skip reposts: in the DOM their status ID and date
+        # are the original tweet's, so detect them even when retweets are not kept
+        detect_reposts = max_retweets > 0 or high_water_mark is not None
 
         while scroll_attempts < max_scroll_attempts:
             scroll_attempts += 1
             
-            try:
-                # Wait for content to load
-                await rate_limit_delay(SCROLL_DELAY)
-                
-                # Get all visible tweets with timeout protection
-                try:
-                    tweet_elements = await asyncio.wait_for(
-                        page.locator('article[data-testid="tweet"]').all(),
-                        timeout=5
-                    )
-                    print(f"[DEBUG] Found {len(tweet_elements)} tweet elements on scroll {scroll_attempts}")
-                except (asyncio.TimeoutError, Exception) as e:
-                    print(f"[DEBUG] Timeout/error getting tweet elements on scroll {scroll_attempts}: {str(e)}")
-                    tweet_elements = []
-                
-                # If no tweets found, wait and try again before giving up
-                if not tweet_elements:
-                    print(f"No tweets found on attempt {scroll_attempts}, waiting and retrying...")
-                    await asyncio.sleep(3)  # Wait longer
-                    
-                    # Try a gentle scroll method instead of aggressive scrolling
-                    try:
-                        # Use smaller, gentler scroll
-                        await asyncio.wait_for(
-                            page.evaluate("window.scrollBy(0, window.innerHeight * 0.8)"),
-                            timeout=3
-                        )
-                        await asyncio.sleep(2)
-                        
-                        # Try again with timeout
-                        tweet_elements = await asyncio.wait_for(
-                            page.locator('article[data-testid="tweet"]').all(),
-                            timeout=5
-                        )
-                        print(f"[DEBUG] After gentle retry: Found {len(tweet_elements)} tweet elements")
-                    except (asyncio.TimeoutError, Exception) as e:
-                        print(f"[DEBUG] Retry scroll/detection timeout: {str(e)}")
-                        tweet_elements = []
-                    
-                    if not tweet_elements:
-                        print("Still no tweets found, but continuing...")
-                        no_new_items_count += 1
-                        # Don't break here, continue to scroll more
-                        if no_new_items_count >= max_no_new_items:
-                            print("Multiple attempts failed, ending tweets scraping")
-                            break
-                        continue
-
+            try:
                 initial_count = len(tweets) + len(retweets)
                 processed_in_batch = 0
                 visible_tweet_ids = []  # Track tweets visible in current scroll
 
-                for idx, tweet in enumerate(tweet_elements):
-                    try:
-                        # Check if tweet is actually visible in viewport
-                        try:
-                            is_visible = await asyncio.wait_for(
-                                tweet.is_visible(),
-                                timeout=1
-                            )
-                            if not is_visible:
-                                continue  # Skip invisible tweets
-                        except:
-                            pass  # Continue processing if visibility check fails
-                        
-                        # Get unique tweet ID
-                        tweet_id = await get_tweet_id(tweet)
-                        
-                        # Skip elements with no valid ID (probably no useful content)
-                        if tweet_id is None:
-                            continue
-                        
-                        # Track this tweet as visible in current batch
-                        visible_tweet_ids.append(tweet_id)
-                        
-                        if tweet_id in processed_ids:
-                            continue
-                        
-                        processed_ids.add(tweet_id)
-                        processed_in_batch += 1
-                        
-                        # Check if it's a retweet only if we want retweets
-                        is_retweet = False
-                        if max_retweets > 0:
-                            is_retweet = await is_repost(tweet)
-                        
-                        if is_retweet and max_retweets > 0:
-                            # Check retweet limit
-                            if len(retweets) >= max_retweets:
-                                print(f"Reached maximum retweets limit ({max_retweets}), skipping further retweets")
-                                continue
-                                
-                            # Screenshots completely removed to improve performance
-                            print(f"Processing retweet #{len(retweets)+1} (ID: {tweet_id})")
-                            
-                            # Get retweet date with timeout
-                            try:
-                                print(f"Getting date for retweet {tweet_id}...")
-                                retweet_date = await asyncio.wait_for(
-                                    get_tweet_date(tweet),
-                                    timeout=3
-                                )
-                                print(f"Date extracted for retweet {tweet_id}: {retweet_date}")
-                            except asyncio.TimeoutError:
-                                print(f"Timeout getting date for retweet {tweet_id}")
-                                retweet_date = "Unknown"
-                            except Exception as e:
-                                print(f"Error getting date for retweet {tweet_id}: {str(e)}")
-                                retweet_date = "Unknown"
-
-                            # Get retweet info with timeout and debugging
-                            try:
-                                print(f"Getting retweet info for {tweet_id}...")
-                                retweet_info = await asyncio.wait_for(
-                                    get_retweet_info(tweet, page),
-                                    timeout=15  # Longer timeout as this includes bio fetching
-                                )
-                                print(f"Retweet info extracted for {tweet_id}")
-                            except asyncio.TimeoutError:
-                                print(f"Timeout getting retweet info for {tweet_id}")
-                                retweet_info = None
-                            except Exception as e:
-                                print(f"Error getting retweet info for {tweet_id}: {str(e)}")
-                                retweet_info = None
-                            
-                            if retweet_info:
-                                retweet_info["retweet_date"] = retweet_date
-                                # Screenshots completely removed for better performance
-                                retweets.append(retweet_info)
-                                print(f"Successfully added retweet {len(retweets)} with date: {retweet_date}")
-                            else:
-                                print(f"Could not extract retweet info for {tweet_id}")
-                            continue
-
-                        # Check tweet limit
-                        if len(tweets) >= max_tweets:
-                            print(f"Reached maximum tweets limit ({max_tweets}), skipping further tweets")
+                if capture.has_payload:
+                    # Structured data from the UserTweets responses, no DOM reads needed
+                    entries = capture.drain()
+                else:
+                    # No GraphQL payload arrived yet, read every visible article in one call
+                    entries = await extract_visible_tweets(page, detect_reposts, processed_ids)
+                    print(f"[DEBUG] Found {len(entries)} tweet elements on scroll {scroll_attempts}")
+
+                    # If no tweets found, wait and try again before giving up
+                    if not entries:
+                        print(f"No tweets found on attempt {scroll_attempts}, scrolling and retrying...")
+                        await driver.scroll()
+
+                        entries = await extract_visible_tweets(page, detect_reposts, processed_ids)
+                        print(f"[DEBUG] After gentle retry: Found {len(entries)} tweet elements")
+
+                        if not entries:
+                            print("Still no tweets found, but continuing...")
+                            no_new_items_count += 1
+                            # Don't break here, continue to scroll more
+                            if no_new_items_count >= max_no_new_items:
+                                print("Multiple attempts failed, ending tweets scraping")
+                                break
                             continue
 
-                        # Process as regular tweet with simpler handling
-                        print(f"Processing tweet #{len(tweets)+1} (ID: {tweet_id})")
-                        
-                        # Get content with timeout protection
-                        try:
-                            print(f"Getting content for tweet {tweet_id}...")
-                            content = await asyncio.wait_for(
-                                get_main_tweet_content(tweet),
-                                timeout=5
-                            )
-                            print(f"Content extracted for tweet {tweet_id}: {len(content) if content else 0} chars")
-                        except asyncio.TimeoutError:
-                            print(f"Timeout getting content for tweet {tweet_id}")
-                            content = None
-                        except Exception as e:
-                            print(f"Error getting content for tweet {tweet_id}: {str(e)}")
-                            content = None
-                        
-                        if content:
-                            # Get tweet date with timeout
-                            try:
-                                print(f"Getting date for tweet {tweet_id}...")
-                                tweet_date = await asyncio.wait_for(
-                                    get_tweet_date(tweet),
-                                    timeout=3
-                                )
-                                print(f"Date extracted for tweet {tweet_id}: {tweet_date}")
-                            except asyncio.TimeoutError:
-                                print(f"Timeout getting date for tweet {tweet_id}")
-                                tweet_date = "Unknown"
-                            except Exception as e:
-                                print(f"Error getting date for tweet {tweet_id}: {str(e)}")
-                                tweet_date = "Unknown"
-                            
-                            # Check if we should stop based on date
-                            if should_stop_at_date(tweet_date, stop_date):
-                                print(f"Stopping scraping with {len(tweets)} tweets collected.")
-                                return tweets, retweets
-                            
-                            # Screenshots completely removed for better performance
-                            tweet_data = {
-                                "tweet_content": content,
-                                "tweet_date": tweet_date
-                            }
-
-                            # Check for quoted tweet
-                            try:
-                                quoted_info = await get_quoted_tweet_info(tweet)
-                                if quoted_info:
-                                    tweet_data.update(quoted_info)
-                            except Exception as e:
-                                print(f"Error getting quoted tweet info: {str(e)}")
-
-                            tweets.append(tweet_data)
-                            print(f"Successfully added tweet {len(tweets)} with date: {tweet_date}")
-                        else:
-                            # Handle tweets without detectable content
-                            print(f"Tweet {tweet_id} has no detectable content, skipping")
+                for entry in entries:
+                    tweet_id = entry.get("id")
+                    if not tweet_id:
+                        continue
 
-                    except Exception as e:
-                        print(f"Error processing tweet element: {str(e)}")
+                    # Track this tweet as visible in current batch
+                    visible_tweet_ids.append(tweet_id)
+                    if tweet_id in processed_ids:
                         continue
 
+                    processed_ids.add(tweet_id)
+                    processed_in_batch += 1
+
+                    # Pinned tweets and reposts are out of chronological order
+                    if high_water_mark is not None and not entry.get("pinned") and not entry.get("is_repost"):
+                        if is_known_tweet(tweet_id, entry.get("date"), known_mark):
+                            print(f"Reached tweets already scraped in a previous run (newest known: {known_mark.get('tweet_date')})")
+                            return tweets, retweets
+                        advance_high_water_mark(high_water_mark, tweet_id, entry.get("date"))
+
+                    counts = (len(tweets), len(retweets))
+                    stop = add_timeline_entry(entry, tweets, retweets, max_tweets, max_retweets, stop_date)
+                    if len(tweets) > counts[0]:
+                        await emit_record(on_record, "tweet", tweets[-1])
+                    elif len(retweets) > counts[1]:
+                        await emit_record(on_record, "retweet", retweets[-1])
+                    if stop:
+                        return tweets, retweets
+
                 # Check progress
                 current_count = len(tweets) + len(retweets)
                 print(f"Batch {scroll_attempts}: Processed {processed_in_batch} new items. Total: {len(tweets)} tweets, {len(retweets)} retweets")
                 print(f"[DEBUG] Visible tweets in this batch: {len(visible_tweet_ids)}, New processed: {processed_in_batch}")
+
+                if checkpoint and processed_in_batch:
+                    checkpoint.update("timeline", tweets=tweets, retweets=retweets, processed_ids=sorted(processed_ids),
+                                      cursor=capture.cursor, scroll_y=driver.scroll_y, high_water_mark=high_water_mark)
                 
                 # Additional debugging to track potential missed tweets
                 if len(visible_tweet_ids) > processed_in_batch + 3:  # More than 3 already-processed tweets
@@ -831,8 +1649,6 @@ async def scrape_tweets(page: Page, username: str, max_tweets: int = 100, max_re
                     # If we had visible tweets but didn't process new ones, we might be scrolling too fast
                     if len(visible_tweet_ids) > 5:  # Many tweets visible but none new
                         print(f"[DEBUG] Many tweets visible ({len(visible_tweet_ids)}) but none new - possible fast scrolling issue")
-                        # Wait a bit longer for content to settle
-                        await asyncio.sleep(1)
                 else:
                     no_new_items_count = 0
 
@@ -840,105 +1656,15 @@ async def scrape_tweets(page: Page, username: str, max_tweets: int = 100, max_re
                     print("Reached end of timeline (no new items)")
                     break
 
-                # Improved gentle scrolling to avoid missing tweets
+                # Scroll and wait for new articles or a UserTweets response instead of sleeping
                 print(f"Scrolling for more content... (attempt {scroll_attempts})")
-                
-                try:
-                    # Get current scroll position
-                    current_scroll = await asyncio.wait_for(
-                        page.evaluate("window.pageYOffset"),
-                        timeout=3
-                    )
-                    
-                    # Gentle incremental scrolling - scroll by smaller chunks
-                    scroll_distance = min(
-                        await asyncio.wait_for(page.evaluate("window.innerHeight"), timeout=3),
-                        800  # Maximum 800px per scroll to avoid missing content
-                    )
-                    
-                    # Perform 3 small scrolls instead of one big jump
-                    for i in range(3):
-                        await asyncio.wait_for(
-                            page.evaluate(f"window.scrollBy(0, {scroll_distance // 3})"),
-                            timeout=3
-                        )
-                        await asyncio.sleep(0.5)  # Short wait between micro-scrolls
-                        
-                        # Check for new tweets after each micro-scroll
-                        try:
-                            new_tweet_count = await asyncio.wait_for(
-                                page.locator('article[data-testid="tweet"]').count(),
-                                timeout=2
-                            )
-                            if new_tweet_count > len(tweet_elements):
-                                print(f"[DEBUG] New tweets loaded during micro-scroll {i+1}: {new_tweet_count} vs {len(tweet_elements)}")
-                                break  # Exit micro-scroll loop if new content appears
-                        except:
-                            pass
-                    
-                    # Wait for dynamic content to load - adaptive timing based on success
-                    if processed_in_batch > 0:
-                        # If we're finding new content, wait longer to ensure we don't miss anything
-                        await asyncio.sleep(2.0)  # Longer wait when successfully collecting
-                        print(f"[DEBUG] Extended wait due to successful collection ({processed_in_batch} new items)")
+                if not await driver.scroll():
+                    # Try one more scroll to the very bottom before giving up
+                    if await driver.scroll(to_bottom=True):
+                        print("Additional scroll worked, continuing...")
                     else:
-                        # Standard wait when not finding much
-                        await asyncio.sleep(1.5)
-                    
-                    # Check if we actually scrolled
-                    new_scroll = await asyncio.wait_for(
-                        page.evaluate("window.pageYOffset"),
-                        timeout=3
-                    )
-                    
-                    if abs(new_scroll - current_scroll) < 50:  # Less than 50px scrolled
-                        print("[DEBUG] Small scroll detected, trying alternative method")
-                        # If normal scroll didn't work, try keyboard scroll as fallback
-                        try:
-                            await asyncio.wait_for(page.keyboard.press('PageDown'), timeout=2)
-                            await asyncio.sleep(1)
-                        except (asyncio.TimeoutError, Exception):
-                            pass
-                    
-                except (asyncio.TimeoutError, Exception) as e:
-                    print(f"Scroll operation timeout/error: {str(e)}")
-                
-                await rate_limit_delay(SCROLL_DELAY)
-
-                # Check if page height changed (with timeout)
-                try:
-                    new_height = await asyncio.wait_for(
-                        page.evaluate("document.body.scrollHeight"),
-                        timeout=3
-                    )
-                except (asyncio.TimeoutError, Exception) as e:
-                    print(f"Page height check timeout: {str(e)}")
-                    new_height = last_height  # Assume no change
-                
-                if new_height == last_height:
-                    # Try one more aggressive scroll before giving up (with timeout)
-                    try:
-                        await asyncio.wait_for(
-                            page.evaluate("window.scrollTo(0, document.body.scrollHeight + 1000)"),
-                            timeout=3
-                        )
-                        await asyncio.sleep(2)
-                        new_height = await asyncio.wait_for(
-                            page.evaluate("document.body.scrollHeight"),
-                            timeout=3
-                        )
-                    except (asyncio.TimeoutError, Exception) as e:
-                        print(f"Aggressive scroll timeout: {str(e)}")
-                        new_height = last_height
-                    
-                    if new_height == last_height:
                         no_new_items_count += 1
-                        print("Page height unchanged, may have reached end")
-                    else:
-                        last_height = new_height
-                        print("Additional scroll worked, continuing...")
-                else:
-                    last_height = new_height
+                        print("No new content after scrolling, may have reached end")
 
             except Exception as e:
                 print(f"Error during scroll {scroll_attempts}: {str(e)}")
@@ -954,20 +1680,125 @@ async def scrape_tweets(page: Page, username: str, max_tweets: int = 100, max_re
         # Ensure scroll_attempts is initialized even in case of early error
         if 'scroll_attempts' not in locals():
             scroll_attempts = 0
+    finally:
+        capture.detach()
 
     print(f"\nScraping completed after {scroll_attempts} scroll attempts!")
+    if driver:
+        print(f"Scroll timing: {driver.summary()}")
     print(f"Final results: {len(tweets)} tweets and {len(retweets)} retweets")
     return tweets, retweets
 
-async def scrape_social_users(page: Page, username: str, user_type: str, max_users: int = 300) -> List[Dict[str, str]]:
-    """Generic function to scrape followers or following with improved efficiency."""
-    users = []
+# In-page harvester for follower/following cells, using the same selector
+# fallback chains as the per-cell locator lookups it replaces.
+EXTRACT_CELLS_JS = """
+({ seen }) => {
+    const seenUsernames = new Set(seen);
+    const text = (el) => (el && el.innerText) ? el.innerText : '';
+
+    const cellUsername = (cell) => {
+        const selectors = ['a[role="link"][href*="/"]', 'a[href*="/"]', 'div[data-testid="User-Name"] a'];
+        for (const selector of selectors) {
+            for (const link of cell.querySelectorAll(selector)) {
+                const href = link.getAttribute('href');
+                if (href && href.includes('/') && !href.includes('/status/')) {
+                    const parts = href.replace(/^\\/+|\\/+$/g, '').split('/');
+                    const name = parts[parts.length - 1];
+                    if (name && !name.startsWith('http')) return name;
+                }
+            }
+        }
+        return '';
+    };
+
+    const displayName = (cell, username) => {
+        const selectors = [
+            'div[data-testid="User-Name"] div:first-child span span',
+            'div[data-testid="User-Name"] div span',
+            'div[data-testid="User-Name"] span'
+        ];
+        for (const selector of selectors) {
+            const name = text(cell.querySelector(selector));
+            if (name.trim() && !name.startsWith('@')) {
+                // Clean up name, and don't return username as display name
+                const cleaned = name.trim().replace(/·/g, '').trim();
+                if (cleaned !== username) return cleaned;
+            }
+        }
+        return '';
+    };
+
+    const bio = (cell) => {
+        const selectors = [
+            'div[data-testid="UserDescription"]',
+            'div[data-testid="UserBio"]',
+            'div[data-testid="UserProfessionalCategory"]'
+        ];
+        for (const selector of selectors) {
+            const value = text(cell.querySelector(selector));
+            if (value) return value.trim().replace(/Follow/g, '').trim();
+        }
+        // Fallback: try to find any descriptive text
+        for (const el of cell.querySelectorAll('div[dir="auto"]')) {
+            const value = text(el);
+            if (value.length > 5 && !value.startsWith('@') && !value.includes('Follow')) return value.trim();
+        }
+        return '';
+    };
+
+    const cells = document.querySelectorAll('div[data-testid="cellInnerDiv"]');
+    const users = [];
+    for (const cell of cells) {
+        const username = cellUsername(cell);
+        if (!username || seenUsernames.has(username)) continue;
+        seenUsernames.add(username);
+        users.push({ username, name: displayName(cell, username), bio: bio(cell) });
+    }
+    return { total: cells.length, users };
+}
+"""
+
+async def harvest_social_cells(page: Page, seen: Set[str]) -> Tuple[int, List[Dict[str, str]]]:
+    """Read handle, display name and bio of every rendered user cell in one call.
+
+    Returns the number of rendered cells and the records for handles not in
+    ``seen``, in the same username/name/bio shape as parse_social_payload.
+    """
+    try:
+        harvest = await asyncio.wait_for(
+            page.evaluate(EXTRACT_CELLS_JS, {"seen": list(seen)}),
+            timeout=10
+        )
+    except (asyncio.TimeoutError, Exception) as e:
+        print(f"[DEBUG] Timeout/error harvesting user cells: {str(e)}")
+        return 0, []
+    return harvest["total"], harvest["users"]
+
+def social_user_record(user_type: str, name: str, bio: str) -> Dict[str, str]:
+    """Build the follower/following dict stored in the scraped profile."""
+    if user_type == "followers":
+        return {"follower_name": name, "follower_bio": bio}
+    return {"following_name": name, "following_bio": bio}
+
+async def scrape_social_users(page: Page, username: str, user_type: str, max_users: int = 300, checkpoint: Optional[UserCheckpoint] = None, on_record=None) -> List[Dict[str, str]]:
+    """Generic function to scrape followers or following with improved efficiency.
+
+    With a ``checkpoint``, progress is saved under ``user_type`` and a saved
+    state is resumed from its cursor (or scroll position). ``on_record`` is
+    called with every new follower/following record as it is added.
+    """
+    saved = checkpoint.section(user_type) if checkpoint else {}
+    users = saved.get("users", [])
+    # Listen for Followers/Following responses before navigating
+    capture = GraphQLCapture(page, GRAPHQL_SOCIAL_OPERATIONS, parse_social_payload)
     try:
+        if saved.get("cursor"):
+            await resume_at_cursor(page, GRAPHQL_SOCIAL_OPERATIONS, saved["cursor"])
+
         # Navigate to the appropriate page
         url = f"https://twitter.com/{username}/{user_type}"
         print(f"Navigating to {url} (max: {max_users} users)")
-        await page.goto(url, wait_until="domcontentloaded", timeout=TIMEOUT)
-        await rate_limit_delay()
+        await limited_goto(page, url, wait_until="domcontentloaded", timeout=TIMEOUT)
 
         # Wait for content to load
         if not await safe_wait_for_selector(page, 'div[data-testid="cellInnerDiv"]', timeout=3000, description=f"{user_type} cells"):
@@ -975,75 +1806,66 @@ async def scrape_social_users(page: Page, username: str, user_type: str, max_use
             return users
 
         # Initialize tracking variables
-        processed_usernames: Set[str] = set()
+        processed_usernames: Set[str] = set(saved.get("processed_usernames", []))
         no_new_users_count = 0
         max_no_new_users = 5  # Increased to get more followers/following
         scroll_attempts = 0
         max_scroll_attempts = 30
+        driver = ScrollDriver(page, 'div[data-testid="cellInnerDiv"]', capture)
+        if saved:
+            print(f"Restored {len(users)} {user_type} from checkpoint")
+            if not saved.get("cursor") and saved.get("scroll_y"):
+                await driver.fast_forward(saved["scroll_y"])
 
         while scroll_attempts < max_scroll_attempts:
             scroll_attempts += 1
             try:
-                # Get all visible user cells
-                cells = await page.locator('div[data-testid="cellInnerDiv"]').all()
-                
-                if not cells:
-                    no_new_users_count += 1
-                    if no_new_users_count >= max_no_new_users:
-                        print(f"No more {user_type} cells found after multiple attempts")
-                        break
-                    await rate_limit_delay()
-                    continue
-
                 initial_count = len(users)
                 processed_in_batch = 0
 
-                for cell in cells:
-                    try:
-                        # Extract username
-                        cell_username = await extract_username_from_cell(cell)
-                        if not cell_username or cell_username in processed_usernames:
-                            continue
-                        
-                        # Check if we've reached the user limit
-                        if len(users) >= max_users:
-                            print(f"Reached maximum {user_type} limit ({max_users}), stopping collection")
+                if capture.has_payload:
+                    # Structured data from the GraphQL responses, no DOM reads needed
+                    records = capture.drain()
+                else:
+                    # No GraphQL payload arrived yet, harvest the rendered cells in one call
+                    cell_count, records = await harvest_social_cells(page, processed_usernames)
+
+                    if not cell_count:
+                        no_new_users_count += 1
+                        if no_new_users_count >= max_no_new_users:
+                            print(f"No more {user_type} cells found after multiple attempts")
                             break
-                            
-                        processed_usernames.add(cell_username)
-                        processed_in_batch += 1
-                        
-                        # Extract display name
-                        display_name = await extract_display_name_from_cell(cell, cell_username)
-                        
-                        # Extract bio
-                        bio = await extract_bio_from_cell(cell)
-                        
-                        # Create user data based on type
-                        if user_type == "followers":
-                            user_data = {
-                                "follower_name": display_name or cell_username,
-                                "follower_bio": bio
-                            }
-                        else:  # following
-                            user_data = {
-                                "following_name": display_name or cell_username,
-                                "following_bio": bio
-                            }
-                        
-                        users.append(user_data)
-                        print(f"Added {user_type[:-1]} #{len(users)}: @{cell_username}" + (f" ({display_name})" if display_name else ""))
-                        
-                        if bio:
-                            print(f"  Bio: {bio[:50]}..." if len(bio) > 50 else f"  Bio: {bio}")
-                        
-                    except Exception as e:
-                        print(f"Error processing {user_type} cell: {str(e)}")
+                        await rate_limit_delay()
                         continue
 
+                for record in records:
+                    cell_username = record["username"]
+                    if cell_username in processed_usernames:
+                        continue
+
+                    # Check if we've reached the user limit
+                    if len(users) >= max_users:
+                        print(f"Reached maximum {user_type} limit ({max_users}), stopping collection")
+                        break
+
+                    processed_usernames.add(cell_username)
+                    processed_in_batch += 1
+
+                    display_name = record["name"] if record["name"] != cell_username else ""
+                    bio = record["bio"]
+                    users.append(social_user_record(user_type, display_name or cell_username, bio))
+                    await emit_record(on_record, user_type[:-1] if user_type == "followers" else user_type, users[-1])
+                    print(f"Added {user_type[:-1]} #{len(users)}: @{cell_username}" + (f" ({display_name})" if display_name else ""))
+
+                    if bio:
+                        print(f"  Bio: {bio[:50]}..." if len(bio) > 50 else f"  Bio: {bio}")
+
                 # Check progress and limits
                 current_count = len(users)
                 print(f"Batch {scroll_attempts}: Processed {processed_in_batch} new {user_type}. Total: {current_count}")
+                if checkpoint and processed_in_batch:
+                    checkpoint.update(user_type, users=users, processed_usernames=sorted(processed_usernames),
+                                      cursor=capture.cursor, scroll_y=driver.scroll_y)
                 
                 # Check if we've reached the user limit
                 if len(users) >= max_users:
@@ -1060,418 +1882,293 @@ async def scrape_social_users(page: Page, username: str, user_type: str, max_use
                     print(f"Reached end of {user_type} list")
                     break
 
-                # Scroll down
-                await page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
-                await rate_limit_delay(SCROLL_DELAY)
+                # Scroll down and wait for new cells or a GraphQL response
+                if not await driver.scroll(to_bottom=True):
+                    no_new_users_count += 1
 
             except Exception as e:
                 print(f"Error during {user_type} scroll {scroll_attempts}: {str(e)}")
                 no_new_users_count += 1
 
         print(f"Total {user_type} collected: {len(users)}")
+        print(f"Scroll timing: {driver.summary()}")
         return users
 
     except Exception as e:
         print(f"Error scraping {user_type}: {str(e)}")
         return users
+    finally:
+        capture.detach()
 
-async def extract_username_from_cell(cell) -> str:
-    """Extract username from a user cell."""
-    username_selectors = [
-        'a[role="link"][href*="/"]',
-        'a[href*="/"]',
-        'div[data-testid="User-Name"] a'
-    ]
-    
-    for selector in username_selectors:
-        try:
-            links = cell.locator(selector)
-            count = await links.count()
-            for i in range(count):
-                href = await links.nth(i).get_attribute('href')
-                if href and '/' in href and not '/status/' in href:
-                    potential_username = href.strip('/').split('/')[-1]
-                    if potential_username and not potential_username.startswith('http'):
-                        return potential_username
-        except Exception:
-            continue
-    
-    return ""
-
-async def extract_display_name_from_cell(cell, username: str) -> str:
-    """Extract display name from a user cell."""
-    name_selectors = [
-        'div[data-testid="User-Name"] div:first-child span span',
-        'div[data-testid="User-Name"] div span',
-        'div[data-testid="User-Name"] span'
-    ]
-    
-    for selector in name_selectors:
-        try:
-            name_element = cell.locator(selector).first
-            if await name_element.count() > 0:
-                name = await name_element.inner_text()
-                if name and name.strip() and not name.startswith('@'):
-                    # Clean up name
-                    name = name.strip().replace("·", "").strip()
-                    if name != username:  # Don't return username as display name
-                        return name
-        except Exception:
-            continue
-    
-    return ""
-
-async def extract_bio_from_cell(cell) -> str:
-    """Extract bio from a user cell."""
-    bio_selectors = [
-        'div[data-testid="UserDescription"]',
-        'div[data-testid="UserBio"]',
-        'div[data-testid="UserProfessionalCategory"]'
-    ]
-    
-    for selector in bio_selectors:
+async def scrape_followers(page: Page, username: str, max_followers: int = 300, checkpoint: Optional[UserCheckpoint] = None, on_record=None) -> List[Dict[str, str]]:
+    """Scrape followers using the generic social scraping function."""
+    return await scrape_social_users(page, username, "followers", max_followers, checkpoint, on_record)
+
+async def scrape_following(page: Page, username: str, max_following: int = 300, checkpoint: Optional[UserCheckpoint] = None, on_record=None) -> List[Dict[str, str]]:
+    """Scrape following using the generic social scraping function."""
+    return await scrape_social_users(page, username, "following", max_following, checkpoint, on_record)
+
+# Shown instead of (or inside) the profile when it cannot be scraped; the text
+# tells apart missing, suspended and protected accounts (see negative_cache.py)
+UNAVAILABLE_SELECTORS = [
+    'div[data-testid="error-detail"]',
+    'div[data-testid="empty-state"]',
+    'div[data-testid="emptyState"]',
+    'div[data-testid="404-error"]',
+]
+
+async def detect_unavailable(page: Page) -> Optional[Dict[str, str]]:
+    """``{"state", "detail"}`` if the page shows an error or protected notice, else None."""
+    for selector in UNAVAILABLE_SELECTORS:
         try:
-            bio_element = cell.locator(selector)
-            if await bio_element.count() > 0:
-                bio = await bio_element.inner_text()
-                if bio:
-                    return bio.strip().replace("Follow", "").strip()
+            element = page.locator(selector).first
+            if await element.count() == 0:
+                continue
+            detail = (await element.inner_text()).strip()
         except Exception:
             continue
-    
-    # Fallback: try to find any descriptive text
-    try:
-        text_elements = cell.locator('div[dir="auto"]')
-        count = await text_elements.count()
-        for i in range(count):
-            text = await text_elements.nth(i).inner_text()
-            if text and len(text) > 5 and not text.startswith('@') and 'Follow' not in text:
-                return text.strip()
-    except Exception:
-        pass
-    
-    return ""
-
-async def scrape_followers(page: Page, username: str, max_followers: int = 300) -> List[Dict[str, str]]:
-    """Scrape followers using the generic social scraping function."""
-    return await scrape_social_users(page, username, "followers", max_followers)
+        state = classify_failure(detail, default="")
+        # An empty timeline of a public account is not an error
+        if state or selector != 'div[data-testid="emptyState"]':
+            return {"state": state or "error", "detail": detail}
+    return None
 
-async def scrape_following(page: Page, username: str, max_following: int = 300) -> List[Dict[str, str]]:
-    """Scrape following using the generic social scraping function."""
-    return await scrape_social_users(page, username, "following", max_following)
+async def scrape_twitter(username: str, max_tweets: int = 100, max_retweets: int = 100, max_followers: int = 1000, max_following: int = 1000, stop_date=None, pool: Optional[BrowserPool] = None, parallel_tabs: bool = False, since: Optional[Dict] = None, checkpoint: Optional[UserCheckpoint] = None, save_json: bool = True, on_record=None) -> Dict:
+    if pool is None:
+        try:
+            async with BrowserPool() as own_pool:
+                return await scrape_twitter(username, max_tweets, max_retweets, max_followers, max_following, stop_date, pool=own_pool, parallel_tabs=parallel_tabs, since=since, checkpoint=checkpoint, save_json=save_json, on_record=on_record)
+        except RuntimeError as e:
+            print(f"Error preparing browser: {str(e)}")
+            return {"user_profile": {"username": username, "bio": ""}, "following": [], "followers": [], "aborted": str(e)}
 
-async def scrape_twitter(username: str, max_tweets: int = 100, max_retweets: int = 100, max_followers: int = 1000, max_following: int = 1000, stop_date=None) -> Dict:
     result = {
         "user_profile": {"username": username, "bio": ""},
         "following": [],
         "followers": []
     }
-    
+
     try:
-        async with async_playwright() as p:
-            # Detect if we have a display available
-            has_display = os.environ.get('DISPLAY') is not None
-            
-            # Launch browser with appropriate settings
-            launch_args = [
-                '--disable-extensions',
-                '--disable-dev-shm-usage',
-                '--no-sandbox',
-                '--disable-gpu' if not has_display else '',
-            ]
-            # Remove empty strings
-            launch_args = [arg for arg in launch_args if arg]
-            
-            print(f"🖥️  Display available: {has_display} (DISPLAY={os.environ.get('DISPLAY', 'None')})")
-            print(f"🚀 Browser args: {launch_args}")
-            
-            browser = await p.chromium.launch(
-                headless=not has_display,  # Headless if no display, headed if display available
-                args=launch_args
-            )
-            
-            # Create context with larger viewport and modern user agent
-            context = await browser.new_context(
-                viewport={'width': 1920, 'height': 1080},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
-            )
-            
-            # Load cookies
-            if os.path.exists(COOKIES_FILE):
-                try:
-                    with open(COOKIES_FILE, "r") as f:
-                        cookies = json.load(f)
-                    await context.add_cookies(cookies)
-                    print("Cookies loaded successfully")
-                except Exception as e:
-                    print(f"Error loading cookies: {str(e)}")
-                    await browser.close()
-                    return result
-            else:
-                print("No cookies file found. Please run login_manual.py first")
-                await browser.close()
-                return result
-            
+        context = await pool.acquire()
+    except Exception as e:
+        print(f"Error preparing browser context: {str(e)}")
+        result["aborted"] = f"browser context: {e}"
+        return result
+
+    blocker = pool.blocker_for(context)
+    if blocker:
+        blocker.reset()
+
+    healthy = True
+    try:
+        # Create main page for profile info
+        page = await context.new_page()
+        page.set_default_timeout(60000)  # Set to 60 seconds instead of 30
+
+        # This is the only load of the profile: the header is read from it and the
+        # timeline continues on it, so listen for UserTweets before navigating
+        timeline_capture = GraphQLCapture(page, GRAPHQL_TIMELINE_OPERATIONS, parse_timeline_payload)
+        timeline_saved = checkpoint.section("timeline") if checkpoint else {}
+        if timeline_saved.get("cursor") and not timeline_saved.get("done"):
+            await resume_at_cursor(page, GRAPHQL_TIMELINE_OPERATIONS, timeline_saved["cursor"])
+
+        # Navigate directly to user's profile with retry logic
+        print(f"\nNavigating to profile @{username}...")
+        navigation_success = False
+        for attempt in range(3):  # Try 3 times
             try:
-                # Create main page for profile info
-                page = await context.new_page()
-                page.set_default_timeout(60000)  # Set to 60 seconds instead of 30
+                await limited_goto(page, f"https://twitter.com/{username}", wait_until="domcontentloaded", timeout=30000)
+                await asyncio.sleep(2)  # Give page time to load
+                navigation_success = True
+                break
+            except Exception as e:
+                print(f"Navigation attempt {attempt + 1}/3 failed: {str(e)}")
+                if attempt < 2:  # Not the last attempt
+                    print("Retrying navigation...")
+                    await asyncio.sleep(5)  # Wait before retrying
                 
-                # First try to access Twitter directly
-                print("\nAccessing Twitter...")
-                try:
-                    await page.goto("https://twitter.com", wait_until="domcontentloaded")
-                except Exception as e:
-                    print(f"Error accessing Twitter: {str(e)}")
-                    await browser.close()
-                    return result
+        if not navigation_success:
+            print(f"Error navigating to profile after 3 attempts")
+            result["unavailable"] = {"state": "timeout", "detail": "navigation failed after 3 attempts"}
+            return result
+
+        if await is_logged_out_page(page):
+            # The cached validation is stale: make the next context re-check the login
+            pool.report_logged_out()
+            healthy = False
+            # Says nothing about the account: not a success, not a negative-cache entry
+            result["aborted"] = "logged out"
+            return result
+        
+        # Verify profile exists and is accessible
+        try:
+            # Check for error messages (missing, suspended, rate limited)
+            unavailable = await detect_unavailable(page)
+            if unavailable and unavailable["state"] != "protected":
+                print(f"Profile error ({unavailable['state']}): {unavailable['detail']}")
+                if unavailable["state"] == "rate_limited":
+                    RATE_LIMITER.on_throttle("error state on profile page")
+                result["unavailable"] = unavailable
+                return result
 
-                # Short wait for initial load
-                await asyncio.sleep(1)
-                
-                # Check for login state using multiple indicators
-                print("Verifying login status...")
+            # Verify profile content is visible with retry logic
+            profile_accessed = False
+            for attempt in range(3):  # Try 3 times
                 try:
-                    # Wait a bit longer for the page to load completely
-                    await asyncio.sleep(1)
-                    
-                    login_verified = False
-                    
-                    # Method 1: Check for login button (should not be present if logged in)
-                    try:
-                        login_button = page.locator('a[href="/login"]')
-                        if await login_button.count() > 0:
-                            print("Not logged in (login button found). Please run login_manual.py again.")
-                            await browser.close()
-                            return result
-                    except Exception as e:
-                        print(f"Could not check for login button: {str(e)}")
-                    
-                    # Method 2: Check for sign up button (should not be present if logged in)
-                    try:
-                        signup_button = page.locator('a[href="/i/flow/signup"]')
-                        if await signup_button.count() > 0:
-                            print("Not logged in (signup button found). Please run login_manual.py again.")
-                            await browser.close()
-                            return result
-                    except Exception as e:
-                        print(f"Could not check for signup button: {str(e)}")
-                    
-                    # Method 3: Try to find home timeline
-                    try:
-                        timeline = page.locator('div[data-testid="primaryColumn"]')
-                        if await timeline.count() > 0:
-                            print("Login verified - timeline found")
-                            login_verified = True
-                    except Exception as e:
-                        print(f"Could not check for timeline: {str(e)}")
-                    
-                    # Method 4: Check for profile link
-                    if not login_verified:
-                        try:
-                            profile_link = page.locator('a[data-testid="AppTabBar_Profile_Link"]')
-                            if await profile_link.count() > 0:
-                                print("Login verified - profile link found")
-                                login_verified = True
-                        except Exception as e:
-                            print(f"Could not check for profile link: {str(e)}")
-                    
-                    # Method 5: Check for any authenticated content
-                    if not login_verified:
-                        try:
-                            # Look for any authenticated content
-                            authenticated_selectors = [
-                                'div[data-testid="SideNav_AccountSwitcher_Button"]',
-                                'div[data-testid="AppTabBar_Home_Link"]',
-                                'div[data-testid="AppTabBar_Explore_Link"]',
-                                'div[data-testid="AppTabBar_Notifications_Link"]'
-                            ]
-                            
-                            for selector in authenticated_selectors:
-                                element = page.locator(selector)
-                                if await element.count() > 0:
-                                    print(f"Login verified - authenticated element found: {selector}")
-                                    login_verified = True
-                                    break
-                        except Exception as e:
-                            print(f"Could not check for authenticated elements: {str(e)}")
+                    # Try multiple selectors to detect profile
+                    profile_selectors = [
+                        'div[data-testid="UserName"]',
+                        'h2[aria-level="2"]',
+                        'div[data-testid="UserDescription"]',
+                        'article[data-testid="tweet"]',
+                        'div[data-testid="primaryColumn"]'
+                    ]
                     
-                    # Method 6: Check page title or URL for authentication
-                    if not login_verified:
+                    for selector in profile_selectors:
                         try:
-                            current_url = page.url
-                            if "twitter.com/home" in current_url or "x.com/home" in current_url:
-                                print("Login verified - on home page")
-                                login_verified = True
-                        except Exception as e:
-                            print(f"Could not check URL: {str(e)}")
+                            await page.wait_for_selector(selector, timeout=3000)
+                            profile_accessed = True
+                            print(f"✅ Profile @{username} accessed successfully (detected via {selector})")
+                            break
+                        except:
+                            continue
                     
-                    if not login_verified:
-                        print("Could not verify login status with any method.")
-                        print("This might be due to Twitter's anti-bot measures or page loading issues.")
-                        print("Attempting to continue anyway...")
-                        # Don't return here, continue with scraping attempt
-                    else:
-                        print("Login verified successfully")
-
-                except Exception as e:
-                    print(f"Error during login verification: {str(e)}")
-                    print("Attempting to continue anyway...")
-                    # Don't return here, continue with scraping attempt
-
-                # Navigate directly to user's profile with retry logic
-                print(f"\nNavigating to profile @{username}...")
-                navigation_success = False
-                for attempt in range(3):  # Try 3 times
-                    try:
-                        await page.goto(f"https://twitter.com/{username}", wait_until="domcontentloaded", timeout=30000)
-                        await asyncio.sleep(2)  # Give page time to load
-                        navigation_success = True
+                    if profile_accessed:
                         break
-                    except Exception as e:
-                        print(f"Navigation attempt {attempt + 1}/3 failed: {str(e)}")
+                    else:
                         if attempt < 2:  # Not the last attempt
-                            print("Retrying navigation...")
-                            await asyncio.sleep(5)  # Wait before retrying
-                        
-                if not navigation_success:
-                    print(f"Error navigating to profile after 3 attempts")
-                    await browser.close()
-                    return result
-                
-                # Verify profile exists and is accessible
-                try:
-                    # Check for error messages
-                    error_selectors = [
-                        'div[data-testid="error-detail"]',
-                        'div[data-testid="empty-state"]',
-                        'div[data-testid="404-error"]'
-                    ]
-                    
-                    for selector in error_selectors:
-                        error_element = page.locator(selector)
-                        if await error_element.count() > 0:
-                            error_text = await error_element.inner_text()
-                            print(f"Profile error: {error_text}")
-                            await browser.close()
-                            return result
-                            
-                    # Verify profile content is visible with retry logic
-                    profile_accessed = False
-                    for attempt in range(3):  # Try 3 times
-                        try:
-                            # Try multiple selectors to detect profile
-                            profile_selectors = [
-                                'div[data-testid="UserName"]',
-                                'h2[aria-level="2"]',
-                                'div[data-testid="UserDescription"]',
-                                'article[data-testid="tweet"]',
-                                'div[data-testid="primaryColumn"]'
-                            ]
-                            
-                            for selector in profile_selectors:
-                                try:
-                                    await page.wait_for_selector(selector, timeout=3000)
-                                    profile_accessed = True
-                                    print(f"✅ Profile @{username} accessed successfully (detected via {selector})")
-                                    break
-                                except:
-                                    continue
-                            
-                            if profile_accessed:
-                                break
-                            else:
-                                if attempt < 2:  # Not the last attempt
-                                    print(f"Profile detection attempt {attempt + 1}/3 failed, retrying...")
-                                    await asyncio.sleep(2)
-                        except Exception as e:
-                            if attempt < 2:
-                                print(f"Profile verification attempt {attempt + 1}/3 failed: {e}, retrying...")
-                                await asyncio.sleep(2)
-                    
-                    # if not profile_accessed:
-                        # Don't return - continue with scraping as profile might still be accessible
-                        
+                            print(f"Profile detection attempt {attempt + 1}/3 failed, retrying...")
+                            await asyncio.sleep(2)
                 except Exception as e:
-                    print(f"Error verifying profile: {str(e)}")
-                    await browser.close()
-                    return result
-
-                # Get profile info
-                print(f"Fetching profile info for @{username}...")
-                result["user_profile"] = await scrape_user_profile(page, username)
-                print(f"Profile info fetched: {result['user_profile']}")
-                
-                if not result["user_profile"]["bio"] and not result["user_profile"]["username"]:
-                    print(f"Could not fetch profile info for @{username}")
-                    await browser.close()
-                    return result
+                    if attempt < 2:
+                        print(f"Profile verification attempt {attempt + 1}/3 failed: {e}, retrying...")
+                        await asyncio.sleep(2)
+            
+            # if not profile_accessed:
+                # Don't return - continue with scraping as profile might still be accessible
                 
-                # Get tweets and retweets
+        except Exception as e:
+            print(f"Error verifying profile: {str(e)}")
+            return result
+
+        # Get profile info
+        print(f"Fetching profile info for @{username}...")
+        result["user_profile"] = await scrape_user_profile(page, username, navigate=False)
+        image_url = result["user_profile"].pop("profile_image_url", None)
+        if image_url:
+            result["profile_image_url"] = image_url
+        print(f"Profile info fetched: {result['user_profile']}")
+        await emit_record(on_record, "profile", {"user_profile": result["user_profile"], "profile_image_url": result.get("profile_image_url")})
+        
+        if "name" not in result["user_profile"]:
+            # The header never rendered: an error page that loaded late, or a timeout
+            result["unavailable"] = await detect_unavailable(page) or {"state": "timeout", "detail": "profile header did not load"}
+            print(f"Could not fetch profile info for @{username} ({result['unavailable']['state']})")
+            return result
+
+        # Protected accounts show the header but no timeline or follower lists
+        unavailable = await detect_unavailable(page)
+        if unavailable and unavailable["state"] == "protected":
+            print(f"@{username} is protected, keeping the profile header only")
+            result["unavailable"] = unavailable
+            return result
+        
+        async def fetch_timeline():
+            # Get tweets and retweets
+            high_water_mark = dict(since or {})
+            if timeline_saved.get("done"):
+                print(f"\nTweets for @{username} already collected in checkpoint")
+                tweets, retweets = timeline_saved.get("tweets", []), timeline_saved.get("retweets", [])
+                high_water_mark.update(timeline_saved.get("high_water_mark") or {})
+            else:
                 print(f"\nFetching tweets and retweets for @{username}...")
-                tweets, retweets = await scrape_tweets(page, username, max_tweets, max_retweets, stop_date)
-                if tweets:
-                    result["tweets"] = tweets
-                    print(f"Found {len(tweets)} tweets")
-                else:
-                    print("No tweets found or error occurred")
-                    
-                if retweets:
-                    result["retweets"] = retweets
-                    print(f"Found {len(retweets)} retweets")
-                else:
-                    print("No retweets found or error occurred")
-                
-                # Only scrape social data if limits are greater than 0
-                if max_followers > 0 or max_following > 0:
-                    # Create a new page for social data (followers/following)
-                    social_page = await context.new_page()
-                    social_page.set_default_timeout(60000)  # Set to 60 seconds
-                    
-                    # Get followers if limit > 0
-                    if max_followers > 0:
-                        print(f"\nFetching followers for @{username}...")
-                        followers = await scrape_followers(social_page, username, max_followers)
-                        if followers:
-                            result["followers"] = followers
-                            print(f"Found {len(followers)} followers")
-                        else:
-                            print("No followers found or error occurred")
-                    else:
-                        print(f"\nSkipping followers (limit set to 0)")
-                    
-                    # Small delay between operations
-                    await asyncio.sleep(1)
-                    
-                    # Get following if limit > 0
-                    if max_following > 0:
-                        print(f"\nFetching following for @{username}...")
-                        following = await scrape_following(social_page, username, max_following)
-                        if following:
-                            result["following"] = following
-                            print(f"Found {len(following)} following")
-                        else:
-                            print("No following found or error occurred")
-                    else:
-                        print(f"\nSkipping following (limit set to 0)")
-                    
-                    await social_page.close()
-                else:
-                    print(f"\nSkipping followers and following (both limits set to 0)")
-                
-                # Scraping completed
-                print("\nScraping completed successfully!")
+                tweets, retweets = await scrape_tweets(page, username, max_tweets, max_retweets, stop_date, capture=timeline_capture,
+                                                       high_water_mark=high_water_mark, checkpoint=checkpoint, on_record=on_record)
+                if checkpoint:
+                    checkpoint.complete("timeline", tweets=tweets, retweets=retweets, high_water_mark=high_water_mark)
+            if high_water_mark:
+                result["high_water_mark"] = high_water_mark
+            if tweets:
+                result["tweets"] = tweets
+                print(f"Found {len(tweets)} tweets")
+            else:
+                print("No tweets found or error occurred")
                 
-            except Exception as e:
-                print(f"Error during scraping: {str(e)}")
-            finally:
-                print("\nClosing browser...")
-                await safe_browser_close(browser)
-                    
+            if retweets:
+                result["retweets"] = retweets
+                print(f"Found {len(retweets)} retweets")
+            else:
+                print("No retweets found or error occurred")
+
+        async def fetch_social(key: str, limit: int, scraper, social_page: Page):
+            if limit <= 0:
+                print(f"\nSkipping {key} (limit set to 0)")
+                return
+            saved = checkpoint.section(key) if checkpoint else {}
+            if saved.get("done"):
+                print(f"\n{key.capitalize()} for @{username} already collected in checkpoint")
+                users = saved.get("users", [])
+            else:
+                print(f"\nFetching {key} for @{username}...")
+                users = await scraper(social_page, username, limit, checkpoint, on_record)
+                if checkpoint:
+                    checkpoint.complete(key, users=users)
+            if users:
+                result[key] = users
+                print(f"Found {len(users)} {key}")
+            else:
+                print(f"No {key} found or error occurred")
+
+        async def new_social_page() -> Page:
+            social_page = await context.new_page()
+            social_page.set_default_timeout(60000)  # Set to 60 seconds
+            return social_page
+
+        if parallel_tabs:
+            # Timeline, followers and following are independent once the session is
+            # up: run them on separate tabs, every navigation and scroll still goes
+            # through the shared RATE_LIMITER
+            jobs = [fetch_timeline()]
+            if max_followers > 0:
+                jobs.append(fetch_social("followers", max_followers, scrape_followers, await new_social_page()))
+            if max_following > 0:
+                jobs.append(fetch_social("following", max_following, scrape_following, await new_social_page()))
+            print(f"\nScraping {len(jobs)} sections of @{username} in parallel tabs...")
+            outcomes = await asyncio.gather(*jobs, return_exceptions=True)
+            for outcome in outcomes:
+                if isinstance(outcome, Exception):
+                    print(f"Error in parallel tab: {str(outcome)}")
+                    healthy = False
+        else:
+            await fetch_timeline()
+
+            # Only scrape social data if limits are greater than 0
+            if max_followers > 0 or max_following > 0:
+                # Create a new page for social data (followers/following)
+                social_page = await new_social_page()
+                await fetch_social("followers", max_followers, scrape_followers, social_page)
+
+                # Small delay between operations
+                await asyncio.sleep(1)
+
+                await fetch_social("following", max_following, scrape_following, social_page)
+                await social_page.close()
+            else:
+                print(f"\nSkipping followers and following (both limits set to 0)")
+        
+        # Scraping completed
+        print("\nScraping completed successfully!")
     except Exception as e:
-        print(f"Critical error: {str(e)}")
-    
+        print(f"Error during scraping: {str(e)}")
+        healthy = False
+    finally:
+        if blocker:
+            print(f"Network blocking for @{username}: {blocker.summary()}")
+        await pool.release(context, healthy)
+
     # --- Save result as JSON file in scraped_profiles directory ---
+    if not save_json:
+        return result
     try:
         scraped_profiles_dir = os.path.join(os.path.dirname(__file__), '..', 'scraped_profiles')
         os.makedirs(scraped_profiles_dir, exist_ok=True)
@@ -1489,30 +2186,179 @@ async def scrape_twitter(username: str, max_tweets: int = 100, max_retweets: int
 # All screenshot functionality has been disabled
 
 
+async def _iterate_records(run, max_buffered: int):
+    """Run ``run(on_record)`` in a task and yield its records as they arrive.
+
+    The queue is bounded, so a slow consumer pauses the scroll loop. Closing
+    the generator (``aclose()`` or leaving an ``async for`` early) cancels
+    the task, which stops scrolling and releases the pages.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_buffered)
+    closed = False
+
+    async def on_record(record_type: str, record: Dict) -> None:
+        if closed:
+            return  # nobody reads the queue anymore, never block the scraper on it
+        await queue.put((record_type, record))
+
+    # Completion is signalled by the task itself, not by a sentinel in the queue:
+    # putting one after aclose() would block forever on a full queue
+    task = asyncio.ensure_future(run(on_record))
+    getter = None
+    try:
+        while True:
+            if queue.empty():
+                if task.done():
+                    break
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                item = getter.result()
+            else:
+                item = queue.get_nowait()
+            yield item
+        await task  # re-raise errors of the scraper
+    finally:
+        closed = True
+        if getter is not None and not getter.done():
+            getter.cancel()
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+# The iter_* helpers return the _iterate_records generator itself instead of
+# re-yielding from it: aclose() on a wrapping generator would not reach the
+# inner one, and the scrape task would keep running until garbage collection
+
+def iter_tweets(page: Page, username: str, max_tweets: int = 100, max_retweets: int = 100, stop_date=None, max_buffered: int = ITER_BUFFER_SIZE):
+    """Async iterator over ``("tweet" | "retweet", record)`` pairs, yielded while scrolling."""
+    return _iterate_records(
+        lambda on_record: scrape_tweets(page, username, max_tweets, max_retweets, stop_date, on_record=on_record), max_buffered)
+
+def iter_followers(page: Page, username: str, max_followers: int = 300, max_buffered: int = ITER_BUFFER_SIZE):
+    """Async iterator over ``("follower", record)`` pairs."""
+    return _iterate_records(
+        lambda on_record: scrape_followers(page, username, max_followers, on_record=on_record), max_buffered)
+
+def iter_following(page: Page, username: str, max_following: int = 300, max_buffered: int = ITER_BUFFER_SIZE):
+    """Async iterator over ``("following", record)`` pairs."""
+    return _iterate_records(
+        lambda on_record: scrape_following(page, username, max_following, on_record=on_record), max_buffered)
+
+def iter_twitter(username: str, max_tweets: int = 100, max_retweets: int = 100, max_followers: int = 1000, max_following: int = 1000, stop_date=None, pool: Optional[BrowserPool] = None, parallel_tabs: bool = False, max_buffered: int = ITER_BUFFER_SIZE):
+    """Async iterator over the ``(record_type, record)`` pairs of a whole user.
+
+    Yields the "profile" record first, then tweets, retweets, followers and
+    following as they are extracted (interleaved with ``parallel_tabs``).
+    Nothing is written to disk.
+    """
+    return _iterate_records(
+        lambda on_record: scrape_twitter(username, max_tweets, max_retweets, max_followers, max_following, stop_date,
+                                         pool=pool, parallel_tabs=parallel_tabs, save_json=False, on_record=on_record),
+        max_buffered)
+
 def extract_list(result, keys):
     for k in keys:
         if k in result and isinstance(result[k], (list, tuple)):
             return result[k]
     return None
 
-async def fetch_user(username, max_tweets=20, max_followers=100, max_following=100, show=20, stop_date=None):
+def load_previous_result(filepath: str) -> Dict:
+    """The stored result of a previous run, or an empty dict."""
+    try:
+        with open(filepath, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) and not data.get("skipped") else {}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def merge_with_previous(result: Dict, previous: Dict) -> None:
+    """Merge the tweets of this run into the stored history of the user."""
+    result["tweets"] = merge_history(result.get("tweets", []), previous.get("tweets", []), "tweet_content", "tweet_date")
+    result["retweets"] = merge_history(result.get("retweets", []), previous.get("retweets", []), "retweet_main_content", "retweet_date")
+    for key in ("tweets", "retweets"):
+        if not result[key]:
+            del result[key]
+    # Keep the stored lists if this run could not fetch them
+    for key in ("followers", "following"):
+        if not result.get(key) and previous.get(key):
+            result[key] = previous[key]
+    if not result.get("high_water_mark") and previous.get("high_water_mark"):
+        result["high_water_mark"] = previous["high_water_mark"]
+
+async def fetch_user(username, max_tweets=20, max_followers=100, max_following=100, show=20, stop_date=None, pool=None, parallel_tabs=False, incremental=False, store: Optional[ProfileStore] = None, stream: Optional[JsonlWriter] = None, negative_cache: Optional[NegativeCache] = None):
     try:
         print(f"\nStarting fetch for @{username}")
         print(f"Requesting tweets: {max_tweets}, followers: {max_followers}, following: {max_following}")
 
+        output_folder = os.path.join(os.path.dirname(__file__), "scraped_profiles")
+        filepath = os.path.join(output_folder, f"{username}.json")
+
+        # Only fetch tweets newer than the previous run's high-water mark
+        if not incremental:
+            previous = {}
+        elif store is not None:
+            previous = store.load_result(username) or {}
+        else:
+            previous = load_previous_result(filepath)
+        since = previous.get("high_water_mark")
+        if since:
+            print(f"Incremental run: newest known tweet {since.get('tweet_id')} ({since.get('tweet_date')})")
+
+        # Partial state is checkpointed while scraping and resumed after a crash
+        checkpoint = UserCheckpoint(username)
+
         result = await scrape_twitter(
             username=username,
             max_tweets=max_tweets,
             max_retweets=0,
             max_followers=max_followers,
             max_following=max_following,
-            stop_date=stop_date
+            stop_date=stop_date,
+            pool=pool,
+            parallel_tabs=parallel_tabs,
+            since=since,
+            checkpoint=checkpoint,
+            save_json=store is None,
+            on_record=stream.for_user(username) if stream else None
         )
 
-        # Fetch profile image URL
-        print(f"Fetching profile image for @{username} ...")
-        image_url = await get_photo_image_url(username)
-        result["profile_image_url"] = image_url
+        if result.get("aborted"):
+            print(f"Scrape of @{username} aborted ({result['aborted']}), nothing saved")
+            if stream is not None:
+                stream.write_summary(username, result, ok=False)
+            return False
+
+        # Missing, suspended and protected accounts are skipped until their state's
+        # re-check time; timeouts and rate limits are retried with backoff
+        unavailable = result.get("unavailable")
+        if negative_cache is not None:
+            if unavailable:
+                entry = negative_cache.record(username, unavailable["state"], unavailable.get("detail", ""))
+                print(f"@{username} is {entry['state']} (failure {entry['attempts']}), "
+                      f"next check in {format_delay(entry['retry_at'] - entry['last_seen'])}")
+            else:
+                negative_cache.clear(username)
+        if unavailable and unavailable["state"] != "protected":
+            # Nothing worth saving: no half-empty file that would count as scraped
+            if stream is not None:
+                stream.write_summary(username, result, ok=False)
+            return False
+
+        if previous:
+            new_tweets = len(result.get("tweets", []))
+            merge_with_previous(result, previous)
+            print(f"Merged {new_tweets} new tweets into {len(previous.get('tweets', []))} stored tweets")
+
+        # The avatar is read from the profile header; only open /photo if it was missing
+        if not result.get("profile_image_url"):
+            print(f"Fetching profile image for @{username} ...")
+            result["profile_image_url"] = await get_photo_image_url(username, pool)
 
         # Extract lists
         followers = extract_list(result, ['followers', 'followers_list', 'followers_data', 'followers_users'])
@@ -1556,45 +2402,173 @@ async def fetch_user(username, max_tweets=20, max_followers=100, max_following=1
         print_list("Followers", followers)
         print_list("Following", following)
 
-        # Save JSON
-        output_folder = os.path.join(os.path.dirname(__file__), "scraped_profiles")
-        os.makedirs(output_folder, exist_ok=True)
-        filepath = os.path.join(output_folder, f"{username}.json")
-        with open(filepath, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
-
-        print(f"\nProfile saved to {filepath}")
+        if store is not None:
+            store.save_result(username, result)
+            print(f"\nProfile saved to {store.path}")
+        else:
+            # Save JSON
+            os.makedirs(output_folder, exist_ok=True)
+            with open(filepath, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+
+            print(f"\nProfile saved to {filepath}")
+
+        sections = ["timeline"] + [name for name, limit in (("followers", max_followers), ("following", max_following)) if limit > 0]
+        if checkpoint.finished(sections):
+            checkpoint.clear()
+        elif UserCheckpoint.exists(username):
+            print(f"Keeping checkpoint for @{username}, the next run will resume it")
+        if stream is not None:
+            stream.write_summary(username, result, ok=True)
         return True
 
     except Exception as e:
         print(f"Failed to fetch @{username}: {e}")
         import traceback
         traceback.print_exc()
+        if stream is not None:
+            stream.write_summary(username, {}, ok=False)
         return False
     
 def is_scraped(username, output_folder):
     path = os.path.join(output_folder, f"{username}.json")
-    if not os.path.exists(path):
+    if not os.path.exists(path) or UserCheckpoint.exists(username):
         return False
     try:
         if os.path.getsize(path) < 10:
             return False
         with open(path, "r", encoding="utf-8") as f:
             data = json.load(f)
-        # consider as processed if there's useful content or a skipped marker
-        if isinstance(data, dict) and (data.get("skipped") or data.get("profile_image_url") or data.get("user_profile") or data.get("tweets")):
+        if not isinstance(data, dict):
             return True
-        return True  # fallback: file exists and non-empty => treated as processed
+        # consider as processed if there's useful content or a skipped marker; the
+        # placeholder left by a failed scrape ({"username", "bio": ""} and nothing
+        # else) and the header-only result of a protected account are not, the
+        # negative cache decides when those accounts are retried
+        if data.get("unavailable"):
+            return False
+        profile = data.get("user_profile") or {}
+        return bool(data.get("skipped") or data.get("tweets") or data.get("followers") or data.get("following")
+                    or profile.get("name") or profile.get("bio"))
     except Exception:
         return False
     
-async def main():
-    import json
+def shard_of(username: str, shard_count: int) -> int:
+    """Deterministic shard index for a handle (case-insensitive)."""
+    digest = hashlib.md5(username.strip().lower().encode("utf-8")).hexdigest()
+    return int(digest, 16) % shard_count
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse an ``INDEX/COUNT`` shard specification such as ``2/8``."""
+    try:
+        index, count = (int(part) for part in value.split("/", 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard '{value}', expected INDEX/COUNT")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"invalid shard '{value}', expected 0 <= INDEX < COUNT")
+    return index, count
+
+def write_progress(path: str, progress: Dict) -> None:
+    """Atomically write a progress snapshot so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(progress, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+async def run_users(usernames: List[str], pool: BrowserPool, concurrency: int = 1, progress_file: Optional[str] = None, **fetch_kwargs) -> Dict[str, int]:
+    """Run fetch_user for every username with at most ``concurrency`` jobs in flight.
+
+    Each job leases its own browser context from the pool, so a crash in one
+    job is reported and counted without cancelling the others. When
+    ``progress_file`` is set, a JSON snapshot is written after every user.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    summary = {"done": 0, "failed": 0}
+    succeeded: List[str] = []
+    failed: List[str] = []
+    started = time.time()
+
+    def report() -> None:
+        if not progress_file:
+            return
+        try:
+            write_progress(progress_file, {
+                "total": len(usernames),
+                "done": summary["done"],
+                "failed": summary["failed"],
+                "succeeded_users": succeeded,
+                "failed_users": failed,
+                "started_at": started,
+                "updated_at": time.time(),
+            })
+        except Exception as e:
+            print(f"Error writing progress file: {str(e)}")
 
-    with open("users_extended.json", "r", encoding="utf-8") as f:
-        data = json.load(f)
+    async def run_one(username: str) -> None:
+        async with semaphore:
+            try:
+                ok = await fetch_user(username, pool=pool, **fetch_kwargs)
+            except Exception as e:
+                print(f"Job for @{username} crashed: {str(e)}")
+                ok = False
+            summary["done" if ok else "failed"] += 1
+            (succeeded if ok else failed).append(username)
+            print(f"[progress] {summary['done'] + summary['failed']}/{len(usernames)} users finished")
+            report()
+
+    report()
+    await asyncio.gather(*(run_one(u) for u in usernames))
+    return summary
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scrape the Twitter profiles listed in users_extended.json")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="number of users scraped at the same time (default: 1)")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="INDEX/COUNT",
+                        help="only scrape the users whose handle hashes into this shard, e.g. 0/8")
+    parser.add_argument("--progress-file", default=None,
+                        help="write a JSON progress snapshot to this path after every user")
+    parser.add_argument("--block-resources", action="store_true",
+                        help="abort image, video, font and tracking requests while scraping")
+    parser.add_argument("--allow-avatars", action="store_true",
+                        help="with --block-resources, still download profile pictures (their URLs are read either way)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help=f"initial navigations/scrolls per second (default: {1 / REQUEST_DELAY:g}), adapted while running")
+    parser.add_argument("--shared-rate-file", default=None,
+                        help="JSON file used to share throttling signals with other processes")
+    parser.add_argument("--parallel-tabs", action="store_true",
+                        help="scrape each user's timeline, followers and following in parallel tabs")
+    parser.add_argument("--db", default=None, metavar="PATH",
+                        help="store results in this SQLite database instead of scraped_profiles/*.json "
+                             "(export with: python profile_store.py export --db PATH)")
+    parser.add_argument("--jsonl", default=None, metavar="PATH",
+                        help="also append every profile, tweet, follower and following record to this JSONL file as it is scraped")
+    parser.add_argument("--refresh", action="store_true",
+                        help="re-scrape already scraped users, fetching only tweets newer than the last run")
+    parser.add_argument("--input", action="append", default=None, metavar="PATH",
+                        help="JSON list of {\"Twitter Username\": ...} entries to scrape, repeatable; handles are "
+                             "merged case-insensitively across files (default: users_extended.json)")
+    parser.add_argument("--negative-cache", default=DEFAULT_NEGATIVE_CACHE, metavar="PATH",
+                        help="database of missing, suspended, protected and failing accounts and when to re-check "
+                             f"them (default: {DEFAULT_NEGATIVE_CACHE}, inspect with: python negative_cache.py list)")
+    parser.add_argument("--recheck-unavailable", action="store_true",
+                        help="try accounts in the negative cache again even if their re-check time has not come")
+    return parser.parse_args(argv)
+
+async def main(argv=None):
+    import json
 
-    usernames = [entry["Twitter Username"] for entry in data]
+    args = parse_args(argv)
+    RATE_LIMITER.configure(rate=args.rate, shared_file=args.shared_rate_file)
+
+    # Reserved paths, invalid handles and case-insensitive duplicates never reach the browser
+    inputs = args.input or ["users_extended.json"]
+    for path in inputs:
+        if not os.path.exists(path):
+            print(f"Input file {path} not found, skipping.")
+    candidates = CandidateFilter()
+    usernames = load_candidates(inputs, candidates)
+    print(candidates.report(f"Candidates from {', '.join(inputs)}"))
     for username in usernames:
         print(username)
 
@@ -1603,11 +2577,70 @@ async def main():
 
     output_folder = os.path.join(os.path.dirname(__file__), "scraped_profiles")
     os.makedirs(output_folder, exist_ok=True)
+
+    if args.shard:
+        shard_index, shard_count = args.shard
+        usernames = [u for u in usernames if shard_of(u, shard_count) == shard_index]
+        print(f"Shard {shard_index}/{shard_count}: {len(usernames)} users")
+
+    # With --db, one query gives every stored handle instead of opening each JSON file
+    # (protected accounts are left out: their re-check time is in the negative cache)
+    store = ProfileStore(args.db) if args.db else None
+    stream = JsonlWriter(args.jsonl) if args.jsonl else None
+    stored_handles = store.scraped_usernames() if store else set()
+
+    # Accounts known to be gone (or failing) are skipped without opening a page
+    negative_cache = NegativeCache(args.negative_cache)
+    blocked = {} if args.recheck_unavailable else negative_cache.blocked_usernames()
+    skipped_unavailable: Dict[str, int] = {}
+
+    pending = []
     for u in usernames:
-        if is_scraped(u, output_folder):
+        entry = blocked.get(u.lower())
+        if entry:
+            skipped_unavailable[entry["state"]] = skipped_unavailable.get(entry["state"], 0) + 1
+            continue
+        if store is not None:
+            already_scraped = u.lower() in stored_handles and not UserCheckpoint.exists(u)
+        else:
+            already_scraped = is_scraped(u, output_folder)
+        if not args.refresh and already_scraped:
             print(f"Already scraped or attempted {u}, skipping.")
             continue
-        await fetch_user(u, max_tweets=10, max_followers=100, max_following=100, show=5, stop_date=stop_date)
+        pending.append(u)
+
+    if skipped_unavailable:
+        print(f"Skipped {sum(skipped_unavailable.values())} accounts from the negative cache ("
+              + ", ".join(f"{n} {state}" for state, n in sorted(skipped_unavailable.items())) + ")")
+    print(f"\nScraping {len(pending)} users with concurrency {args.concurrency}")
+    started = time.monotonic()
+
+    # One browser for the whole run; contexts are reused across users
+    try:
+        async with BrowserPool(recycle_after=CONTEXT_RECYCLE_AFTER, block_resources=args.block_resources,
+                               allow_avatars=args.allow_avatars) as pool:
+            summary = await run_users(
+                pending, pool, args.concurrency, progress_file=args.progress_file,
+                max_tweets=10, max_followers=100, max_following=100, show=5, stop_date=stop_date,
+                parallel_tabs=args.parallel_tabs, incremental=args.refresh, store=store, stream=stream,
+                negative_cache=negative_cache
+            )
+    except RuntimeError as e:
+        print(f"Error: {str(e)}")
+        return
+    finally:
+        negative_cache.close()
+        if store is not None:
+            store.close()
+        if stream is not None:
+            stream.close()
+            print(f"Streamed {stream.records} records to {stream.path}")
+
+    elapsed = time.monotonic() - started
+    finished = summary["done"] + summary["failed"]
+    rate = finished / (elapsed / 60) if elapsed > 0 else 0.0
+    print(f"\nRun summary: {summary['done']} succeeded, {summary['failed']} failed in {elapsed:.1f}s "
+          f"({rate:.2f} users/minute, concurrency {args.concurrency}, {RATE_LIMITER.summary()})")
 
 if __name__ == "__main__":
     asyncio.run(main())
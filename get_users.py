@@ -1,9 +1,19 @@
 import requests
-import json
+import argparse
+import asyncio
 import re
 import time
 import sys
-from typing import List, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+from requests.adapters import HTTPAdapter
+
+from rate_limiter import AdaptiveRateLimiter
+from search_cache import SearchCache, DEFAULT_CACHE_FILE, DEFAULT_TTL, DEFAULT_MAX_BYTES
+from query_planner import PaginationPlanner, load_query_stats, save_query_stats, DEFAULT_STATS_FILE
+from journal import JsonJournal
+from candidates import CandidateFilter
 
 import os
 from dotenv import load_dotenv
@@ -14,9 +24,8 @@ load_dotenv()
 # Get API key from environment variables
 API_KEY = os.getenv('serper_api_key')
 
-if not API_KEY:
-    raise ValueError("serper_api_key not found in environment variables")
-SEARCH_URL = "https://google.serper.dev/search"
+# Point serper_url (or --search-url) at a local stub server to test without the real API
+SEARCH_URL = os.getenv('serper_url') or "https://google.serper.dev/search"
 OUTPUT_FILE = "users_extended.json"  # existing file will be loaded and preserved
 
 # --- user params ---
@@ -70,8 +79,13 @@ queries = [
     "it student casablanca site:https://x.com/"
 ]
 
-max_pages_per_query = 10   # how many pages to try per query (set to 1,2,3,...)
-delay_between_requests = 1.0  # seconds (increase if rate limited)
+max_pages_per_query = 10   # average pages per query; unproductive queries stop early and leave their pages to the others
+min_new_users_per_page = 1  # a page with fewer new users counts as low-yield
+low_yield_patience = 2  # stop paging a query after this many low-yield pages in a row
+max_concurrent_requests = 8  # search requests in flight at the same time
+requests_per_second = 5.0  # initial shared request rate, halved on HTTP 429 and slowly raised again
+max_retries = 3  # retries per request on 429, 5xx and network errors
+batch_size = 10  # (query, page) pairs sent in one batched search request
 location_context = "Casablanca, Casablanca-Settat, Morocco"  # optional location param sent to API
 gl = "ma"
 # --------------------
@@ -83,25 +97,6 @@ HEADERS = {
 
 username_re = re.compile(r"x\.com/([A-Za-z0-9_]+)")
 
-def load_existing_users(path: str) -> List[Dict]:
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, list):
-                return data
-            else:
-                print("Existing file is not a list — starting with empty list.")
-                return []
-    except FileNotFoundError:
-        return []
-    except json.JSONDecodeError:
-        print("Warning: existing JSON file corrupt or empty. Back it up and restart.")
-        return []
-
-def save_users(path: str, users: List[Dict]):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(users, f, ensure_ascii=False, indent=4)
-
 def infer_location(item: dict) -> str:
     # Basic heuristics: check snippet/title for known city names or 'Maroc'
     snippet = (item.get("snippet") or "").lower()
@@ -114,7 +109,9 @@ def infer_location(item: dict) -> str:
         return "Morocco"
     return item.get("date") or "Unknown"
 
-def extract_users_from_response(data: dict) -> List[Dict]:
+def extract_users_from_response(data: dict, candidates: Optional[CandidateFilter] = None) -> List[Dict]:
+    """Users linked from one result page; reserved paths (/search, /i/...) and invalid handles are dropped."""
+    candidates = candidates or CandidateFilter()
     found = []
     for item in data.get("organic", []):
         link = item.get("link", "") or ""
@@ -123,7 +120,9 @@ def extract_users_from_response(data: dict) -> List[Dict]:
             # sometimes the link uses http instead of https or 'www', try a looser regex on the link
             match = re.search(r"x\.com/([A-Za-z0-9_]+)", link)
         if match:
-            username = match.group(1)
+            username = candidates.check(match.group(1))
+            if username is None:
+                continue
             loc = infer_location(item)
             entry = {
                 "Twitter Username": username,
@@ -136,68 +135,259 @@ def extract_users_from_response(data: dict) -> List[Dict]:
             found.append(entry)
     return found
 
-def make_request(query: str, page: int = 1):
-    payload = {
+def make_session(pool_size: int) -> requests.Session:
+    """A keep-alive session whose connection pool fits the in-flight requests."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+class ThreadSessions:
+    """One keep-alive session per executor thread, since requests.Session is not documented as thread-safe."""
+
+    def __init__(self):
+        self.local = threading.local()
+        self.sessions: List[requests.Session] = []
+        self.lock = threading.Lock()
+
+    def get(self) -> requests.Session:
+        session = getattr(self.local, "session", None)
+        if session is None:
+            # A thread sends one request at a time, so one pooled connection is enough
+            session = self.local.session = make_session(1)
+            with self.lock:
+                self.sessions.append(session)
+        return session
+
+    def close(self):
+        with self.lock:
+            for session in self.sessions:
+                session.close()
+            self.sessions.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def build_payload(query: str, page: int = 1) -> Dict:
+    return {
         "q": query,
         "gl": gl,
         # include location context if helpful
         "location": location_context,
         "page": page
     }
-    # Serper might not support 'page' on all plans; if not, API may ignore it or return same results.
-    resp = requests.post(SEARCH_URL, headers=HEADERS, json=payload, timeout=30)
+
+def post_search(payload, session: requests.Session):
+    """POST one payload dict, or a list of them for a batched search. The session carries the API headers."""
+    resp = session.post(SEARCH_URL, json=payload, timeout=30)
     resp.raise_for_status()
     return resp.json()
 
-def main():
-    existing = load_existing_users(OUTPUT_FILE)
-    existing_usernames = {u["Twitter Username"].lower(): u for u in existing}
-    total_added = 0
+def is_failed_item(item) -> bool:
+    """True for an entry of a batched response that carries an error instead of results."""
+    if not isinstance(item, dict):
+        return True
+    return "organic" not in item and any(k in item for k in ("message", "error", "statusCode"))
+
+class SearchClient:
+    """Sends search requests with a concurrency cap, a shared rate limit and per-request retries."""
+
+    def __init__(self, sessions: ThreadSessions, executor: ThreadPoolExecutor, limiter: AdaptiveRateLimiter,
+                 concurrency: int, cache: Optional[SearchCache] = None, cache_only: bool = False):
+        self.sessions = sessions
+        self.executor = executor
+        self.limiter = limiter
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.cache = cache
+        self.cache_only = cache_only
+        self.http_requests = 0
+
+    def post_blocking(self, payload):
+        """Runs on an executor thread, with that thread's own session."""
+        return post_search(payload, self.sessions.get())
+
+    async def post(self, payload, label: str):
+        """POST with retry and backoff on 429, 5xx and network errors. None if it failed."""
+        loop = asyncio.get_running_loop()
+        for attempt in range(max_retries + 1):
+            async with self.semaphore:
+                await self.limiter.acquire()
+                try:
+                    self.http_requests += 1
+                    data = await loop.run_in_executor(self.executor, self.post_blocking, payload)
+                    self.limiter.on_success()
+                    return data
+                except requests.HTTPError as e:
+                    status = e.response.status_code if e.response is not None else None
+                    if status == 429:
+                        self.limiter.on_throttle(f"HTTP 429 for {label}")
+                    elif status is not None and status < 500:
+                        print(f"HTTP error for {label}: {e}. Skipping.")
+                        return None
+                    else:
+                        print(f"HTTP error for {label}: {e}.")
+                except requests.RequestException as e:
+                    print(f"Error fetching {label}: {e}.")
+            if attempt < max_retries:
+                wait = 2 ** (attempt + 1)
+                print(f"  Retry {attempt + 1}/{max_retries} for {label} in {wait}s...")
+                await asyncio.sleep(wait)
+        print(f"  All retries failed for {label} — skipping.")
+        return None
+
+    def cached(self, query: str, page: int) -> Optional[dict]:
+        return self.cache.get(build_payload(query, page)) if self.cache is not None else None
 
-    for q in queries:
-        for page in range(1, max_pages_per_query + 1):
-            try:
-                print(f"Searching query: {q!r}  — page {page}")
-                data = make_request(q, page=page)
-            except requests.HTTPError as e:
-                print(f"HTTP error for query {q} page {page}: {e}. Retrying after backoff...")
-                # simple backoff loop
-                for attempt in range(1, 4):
-                    wait = 2 ** attempt
-                    time.sleep(wait)
-                    try:
-                        data = make_request(q, page=page)
-                        break
-                    except Exception as e2:
-                        print(f"  Retry {attempt} failed: {e2}")
-                else:
-                    print("  All retries failed — skipping this page.")
-                    continue
-            except Exception as e:
-                print(f"Error fetching page for query {q}: {e}. Skipping page.")
+    async def fetch_page(self, query: str, page: int) -> Optional[dict]:
+        """Fetch one result page. None if it failed."""
+        data = await self.post(build_payload(query, page), f"{query!r} page {page}")
+        if data is not None and is_failed_item(data):
+            print(f"  Search error for {query!r} page {page}: {data} — skipping this page.")
+            return None
+        if data is not None and self.cache is not None:
+            self.cache.put(build_payload(query, page), data)
+        return data
+
+    async def fetch_batch(self, batch: List[tuple]) -> List[Optional[dict]]:
+        """Fetch several (query, page) pairs in one request.
+
+        Items that failed inside the batch response (or are missing from it)
+        are retried one by one, so a single bad item never resends the batch.
+        """
+        if len(batch) == 1:
+            return [await self.fetch_page(*batch[0])]
+        payloads = [build_payload(q, page) for q, page in batch]
+        data = await self.post(payloads, f"batch of {len(batch)} ({batch[0][0]!r} page {batch[0][1]}...)")
+        items = data if isinstance(data, list) else []
+        results = []
+        for position, (q, page) in enumerate(batch):
+            item = items[position] if position < len(items) else None
+            if item is None or is_failed_item(item):
+                print(f"  {q!r} page {page} failed in batch, retrying it alone...")
+                results.append(await self.fetch_page(q, page))
                 continue
+            if self.cache is not None:
+                self.cache.put(payloads[position], item)
+            results.append(item)
+        return results
+
+def merge_page(data: dict, users: JsonJournal, candidates: Optional[CandidateFilter] = None) -> int:
+    """Journal the users of one result page that are not known yet. Returns how many were new."""
+    return users.extend(extract_users_from_response(data, candidates))
+
+async def fetch_wave(client: SearchClient, wave: List[tuple], batch_size: int) -> List[Optional[dict]]:
+    """Fetch the pages of one wave: cached ones directly, the rest in concurrent batches."""
+    results: List[Optional[dict]] = [None] * len(wave)
+    pending = []
+    for index, (q, page) in enumerate(wave):
+        data = client.cached(q, page)
+        if data is not None:
+            results[index] = data
+        elif client.cache_only:
+            print(f"  Not cached: {q!r} page {page} — skipping (cache-only mode).")
+        else:
+            pending.append(index)
+
+    async def run(indexes: List[int]):
+        batch = [wave[i] for i in indexes]
+        print(f"Searching {len(batch)} request(s): " + ", ".join(f"{q!r} page {page}" for q, page in batch))
+        for index, data in zip(indexes, await client.fetch_batch(batch)):
+            results[index] = data
+
+    batch_size = max(1, batch_size)
+    await asyncio.gather(*(run(pending[i:i + batch_size]) for i in range(0, len(pending), batch_size)))
+    return results
+
+async def discover(users: JsonJournal, concurrency: int, rate: float,
+                   cache: Optional[SearchCache] = None, cache_only: bool = False, batch_size: int = 1,
+                   stats_file: str = DEFAULT_STATS_FILE) -> int:
+    """Page through the queries in waves planned by PaginationPlanner and merge new users."""
+    limiter = AdaptiveRateLimiter(rate=rate, min_rate=0.2, max_rate=max(rate, 20.0), name="serper")
+    planner = PaginationPlanner(queries, load_query_stats(stats_file), max_pages_per_query,
+                                min_new_users=min_new_users_per_page, patience=low_yield_patience)
+    candidates = CandidateFilter()
+    total_added = 0
+
+    with ThreadSessions() as sessions, ThreadPoolExecutor(max_workers=concurrency) as executor:
+        client = SearchClient(sessions, executor, limiter, concurrency, cache, cache_only)
+        wave = planner.next_wave()
+        while wave:
+            results = await fetch_wave(client, wave, batch_size)
+
+            # Merged in wave order, so users.json does not depend on response timing
+            added_in_wave = 0
+            for (q, page), data in zip(wave, results):
+                added_this_page = merge_page(data, users, candidates) if data is not None else 0
+                added_in_wave += added_this_page
+                print(f"  {q!r} page {page}: " + (f"+{added_this_page} new users" if added_this_page else "no new users"))
+                planner.record(q, page, data, added_this_page)
+
+            if added_in_wave:
+                # Already on disk: every new user was appended to the journal as it was merged
+                print(f"  +{added_in_wave} new users added (journaled).")
+            total_added += added_in_wave
+            wave = planner.next_wave()
+
+    print(candidates.report("Search result links"))
+    save_query_stats(planner.finish(), stats_file)
+    print(f"Planner: {planner.summary()}. Query hit rates saved to {stats_file}")
+    print(f"Search requests: {client.http_requests} HTTP calls, {limiter.summary()}"
+          + (f", {cache.summary()}" if cache is not None else ""))
+    return total_added
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Collect Twitter usernames from Serper search results")
+    parser.add_argument("--concurrency", type=int, default=max_concurrent_requests,
+                        help=f"search requests in flight at the same time (default: {max_concurrent_requests})")
+    parser.add_argument("--rate", type=float, default=requests_per_second,
+                        help=f"initial requests per second, adapted on HTTP 429 (default: {requests_per_second:g})")
+    parser.add_argument("--batch-size", type=int, default=batch_size,
+                        help=f"searches sent per HTTP request, 1 disables batching (default: {batch_size})")
+    parser.add_argument("--stats-file", default=DEFAULT_STATS_FILE,
+                        help=f"per-query hit rates used to order the next run (default: {DEFAULT_STATS_FILE})")
+    parser.add_argument("--search-url", default=SEARCH_URL,
+                        help="search endpoint, e.g. a local stub server (default: serper_url env or google.serper.dev)")
+    parser.add_argument("--cache-file", default=DEFAULT_CACHE_FILE,
+                        help=f"response cache database (default: {DEFAULT_CACHE_FILE})")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL / 3600,
+                        help=f"hours a cached response stays valid, 0 = forever (default: {DEFAULT_TTL / 3600:g})")
+    parser.add_argument("--cache-max-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help=f"cache size cap, least recently used responses are evicted (default: {DEFAULT_MAX_BYTES // (1024 * 1024)})")
+    parser.add_argument("--no-cache", action="store_true", help="always call the API and do not store responses")
+    parser.add_argument("--cache-only", action="store_true", help="replay cached responses only, never call the API")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global SEARCH_URL
+    args = parse_args(argv)
+    SEARCH_URL = args.search_url
+    if args.no_cache and args.cache_only:
+        raise ValueError("--no-cache and --cache-only cannot be combined")
+    if not API_KEY and not args.cache_only:
+        raise ValueError("serper_api_key not found in environment variables")
+
+    # New users are appended to users_extended.json.journal and folded into the
+    # JSON file every few hundred users and at the end, instead of rewriting it per wave
+    users = JsonJournal(OUTPUT_FILE, key=lambda u: u["Twitter Username"].lower(), indent=4)
+    users.load()
+
+    cache = None if args.no_cache else SearchCache(args.cache_file, ttl=args.cache_ttl * 3600,
+                                                   max_bytes=int(args.cache_max_mb * 1024 * 1024))
+    started = time.monotonic()
+    try:
+        total_added = asyncio.run(discover(users, max(1, args.concurrency), args.rate,
+                                           cache, args.cache_only, args.batch_size, args.stats_file))
+    finally:
+        users.close()
+        if cache is not None:
+            cache.close()
 
-            new_entries = extract_users_from_response(data)
-            added_this_page = 0
-            for e in new_entries:
-                uname_lower = e["Twitter Username"].lower()
-                if uname_lower not in existing_usernames:
-                    existing_usernames[uname_lower] = e
-                    existing.append(e)
-                    added_this_page += 1
-                    total_added += 1
-
-            if added_this_page:
-                # Save progress immediately (append semantics preserved by loading prior file)
-                save_users(OUTPUT_FILE, existing)
-                print(f"  +{added_this_page} new users added (saved).")
-            else:
-                print("  No new users on this page.")
-
-            # be polite / avoid rate limits
-            time.sleep(delay_between_requests)
-
-    print(f"Done. Total new users added this run: {total_added}. Output file: {OUTPUT_FILE}")
+    print(f"Done in {time.monotonic() - started:.1f}s. Total new users added this run: {total_added}. Output file: {OUTPUT_FILE}")
 
 if __name__ == "__main__":
     main()
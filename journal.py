@@ -0,0 +1,125 @@
+"""Append-only journal for JSON list outputs.
+
+Long runs used to rewrite a whole JSON file after every new record. A
+JsonJournal keeps the JSON file as a snapshot and appends new records to
+``<file>.journal`` (one JSON object per line), which costs O(1) per record.
+Every ``compact_every`` records, and on ``close()``, the snapshot is
+rewritten from memory to a temporary file and atomically renamed over the
+old one, then the journal is emptied.
+
+Loading reads the snapshot plus the journal. A line cut off by a crash is
+skipped, and with a ``key`` function, records that are both in the snapshot
+and the journal (a crash between the rename and emptying the journal) are
+only kept once.
+"""
+import json
+import os
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_COMPACT_EVERY = 200
+
+
+class JsonJournal:
+    def __init__(self, path: str, key: Optional[Callable[[Dict], str]] = None,
+                 indent: int = 2, compact_every: int = DEFAULT_COMPACT_EVERY):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.key = key
+        self.indent = indent
+        self.compact_every = compact_every
+        self.records: List[Dict] = []
+        self._keys = set()
+        self._pending = 0
+        self._file = None
+
+    def load(self) -> List[Dict]:
+        """Read the snapshot and replay the journal into ``records``."""
+        self.records, self._keys = [], set()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, list):
+                for record in data:
+                    self._remember(record)
+            else:
+                print(f"{self.path} is not a list — starting with empty list.")
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError:
+            print(f"Warning: {self.path} corrupt or empty. Back it up and restart.")
+
+        replayed = 0
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # partial line written when the process was killed
+                    if self._remember(record):
+                        replayed += 1
+                        self._pending += 1
+        except FileNotFoundError:
+            pass
+        if replayed:
+            print(f"Replayed {replayed} records from {self.journal_path}")
+        return self.records
+
+    def _remember(self, record: Dict) -> bool:
+        if self.key is not None:
+            key = self.key(record)
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+        self.records.append(record)
+        return True
+
+    def append(self, record: Dict) -> bool:
+        """Add a record to memory and the journal. False if its key is already known."""
+        if not self._remember(record):
+            return False
+        if self._file is None:
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+            if self._file.tell() and not self._ends_with_newline():
+                self._file.write("\n")  # terminate a partial line left by a crash
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._pending += 1
+        if self._pending >= self.compact_every:
+            self.compact()
+        return True
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.journal_path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def extend(self, records: List[Dict]) -> int:
+        return sum(1 for record in records if self.append(record))
+
+    def compact(self) -> None:
+        """Write all records to the snapshot (atomic rename) and empty the journal."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.records, f, ensure_ascii=False, indent=self.indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._pending = 0
+
+    def close(self) -> None:
+        if self._pending or os.path.exists(self.journal_path):
+            self.compact()
+        elif self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def load_json_list(path: str) -> List[Dict]:
+    """Read a journaled JSON list (snapshot plus journal) without writing anything."""
+    return JsonJournal(path).load()
@@ -1,40 +1,183 @@
+#!/usr/bin/env python3
+"""Merge twitter_location_only.json with the image links and scraped profiles.
+
+Profile files are parsed and rendered in a process pool and the merged list
+is streamed to twitter_location_only_completed.json, entry by entry. A
+manifest of the inputs (profile file mtime/size/hash and a hash of the
+location entry and image URL) is kept with the rendered entries, so a rerun
+only re-merges the profiles that changed since the last run.
+"""
+import argparse
+import hashlib
 import json
 import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from journal import load_json_list
+
+LOCATION_FILE = "twitter_location_only.json"
+IMAGES_FILE = "profile_images_links.json"
+PROFILES_DIR = "scraped_profiles"
+OUTPUT_FILE = "twitter_location_only_completed.json"
+CACHE_DIR = ".merge_cache"  # rendered entries of the previous run
+MANIFEST_FILE = os.path.join(CACHE_DIR, "manifest.json")
+
 
-# Load twitter_location_only.json
-with open("twitter_location_only.json", "r", encoding="utf-8") as f:
-    location_data = json.load(f)
+def render_entry(entry: Dict) -> str:
+    """Serialize one entry exactly as it appears inside the indent=2 output list."""
+    return "  " + json.dumps(entry, ensure_ascii=False, indent=2).replace("\n", "\n  ")
 
-# Load profile_images_links.json
-with open("profile_images_links.json", "r", encoding="utf-8") as f:
-    images_data = json.load(f)
 
-# Create a dict for fast lookup of image_url
-images_dict = {entry["username"]: entry["image_url"] for entry in images_data if "username" in entry}
+def entry_hash(entry: Dict, image_url: Optional[str]) -> str:
+    payload = json.dumps([entry, image_url], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
 
-# Directory containing scraped profiles
-profiles_dir = "scraped_profiles"
 
-for entry in location_data:
+def merge_entry(job: Tuple[Dict, Optional[str], str, Optional[str]]) -> Tuple[Optional[str], Optional[str]]:
+    """Worker: add image_url and profile_data to an entry and render it.
+
+    Returns the rendered entry and the sha1 of the profile file (None if
+    missing). The rendered entry is None when the file content still has
+    ``known_hash``, i.e. only its mtime changed and the cached text is valid.
+    """
+    entry, image_url, profile_path, known_hash = job
+    entry = dict(entry)
+    entry["image_url"] = image_url
+    profile_hash = None
+    try:
+        with open(profile_path, "rb") as pf:
+            raw = pf.read()
+        profile_hash = hashlib.sha1(raw).hexdigest()
+        if known_hash and profile_hash == known_hash:
+            return None, profile_hash
+        try:
+            entry["profile_data"] = json.loads(raw.decode("utf-8"))
+        except Exception:
+            entry["profile_data"] = None
+    except FileNotFoundError:
+        entry["profile_data"] = None
+    return render_entry(entry), profile_hash
+
+
+def uncached_fragment(entry: Dict, images_dict: Dict) -> str:
     username = entry.get("Twitter Username")
-    if username:
-        # Add image_url if available
-        entry["image_url"] = images_dict.get(username)
-        # Add profile data if available
-        profile_path = os.path.join(profiles_dir, f"{username}.json")
-        if os.path.exists(profile_path):
-            with open(profile_path, "r", encoding="utf-8") as pf:
-                try:
-                    profile_data = json.load(pf)
-                    entry["profile_data"] = profile_data
-                except Exception as e:
-                    entry["profile_data"] = None
+    if not username:
+        return render_entry(entry)  # entries without a handle are copied unchanged
+    return merge_entry((entry, images_dict.get(username), os.path.join(PROFILES_DIR, f"{username}.json"), None))[0]
+
+
+def load_manifest(full: bool) -> Dict:
+    if full:
+        return {}
+    try:
+        with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def profile_stat(path: str) -> Optional[Dict]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return {"mtime": stat.st_mtime, "size": stat.st_size}
+
+
+def fragment_path(username: str) -> str:
+    return os.path.join(CACHE_DIR, f"{username}.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge location data, profile images and scraped profiles")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes used to parse profile files (default: CPU count)")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the manifest and re-merge every profile")
+    args = parser.parse_args()
+
+    # Load twitter_location_only.json
+    with open(LOCATION_FILE, "r", encoding="utf-8") as f:
+        location_data = json.load(f)
+
+    # Load profile_images_links.json (plus the journal of an unfinished fetch_images.py run)
+    images_data = load_json_list(IMAGES_FILE)
+
+    # Create a dict for fast lookup of image_url
+    images_dict = {entry["username"]: entry["image_url"] for entry in images_data if "username" in entry}
+    del images_data
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    manifest = load_manifest(args.full)
+    new_manifest = {}
+
+    # A handle listed twice may come with different entries: never cache those
+    duplicates = {u for u, n in Counter(e.get("Twitter Username") for e in location_data).items() if u and n > 1}
+
+    # Decide per entry whether the rendered text of the last run is still valid
+    plan = []  # (username or None if not cached, cached fragment path or None, job or None, manifest record)
+    jobs = []
+    for entry in location_data:
+        username = entry.get("Twitter Username")
+        if not username or username in duplicates:
+            plan.append((None, None, None, None))
+            continue
+        image_url = images_dict.get(username)
+        profile_path = os.path.join(PROFILES_DIR, f"{username}.json")
+        record = {"entry": entry_hash(entry, image_url), "profile": profile_stat(profile_path)}
+        previous = manifest.get(username) or {}
+        reusable = previous.get("entry") == record["entry"] and os.path.exists(fragment_path(username))
+        if reusable and previous.get("profile") == record["profile"]:
+            record["sha1"] = previous.get("sha1")
+            plan.append((username, fragment_path(username), None, record))
         else:
-            entry["profile_data"] = None
+            # Changed mtime/size: the worker hashes the file and only re-parses it if the content changed
+            job = (entry, image_url, profile_path, previous.get("sha1") if reusable else None)
+            jobs.append(job)
+            plan.append((username, None, job, record))
+
+    unchanged = sum(1 for _, cached, _, _ in plan if cached)
+    print(f"{len(location_data)} entries: {unchanged} unchanged since the last merge, {len(plan) - unchanged} to merge")
+
+    tmp_output = f"{OUTPUT_FILE}.tmp"
+    with ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        # map() keeps the input order, so results can be streamed as they come back
+        results = pool.map(merge_entry, jobs, chunksize=32) if jobs else iter(())
+        with open(tmp_output, "w", encoding="utf-8") as out:
+            out.write("[")
+            for index, (username, cached, job, record) in enumerate(plan):
+                if username is None:
+                    fragment = uncached_fragment(location_data[index], images_dict)
+                elif cached:
+                    with open(cached, "r", encoding="utf-8") as cf:
+                        fragment = cf.read()
+                else:
+                    fragment, record["sha1"] = next(results)
+                    if fragment is None:
+                        with open(fragment_path(username), "r", encoding="utf-8") as cf:
+                            fragment = cf.read()
+                    else:
+                        with open(fragment_path(username), "w", encoding="utf-8") as cf:
+                            cf.write(fragment)
+                if username is not None:
+                    new_manifest[username] = record
+                out.write(("\n" if index == 0 else ",\n") + fragment)
+            out.write("\n]" if plan else "]")
+    os.replace(tmp_output, OUTPUT_FILE)
+
+    # Drop cached entries of users that are no longer in the location file
+    for username in set(manifest) - set(new_manifest):
+        try:
+            os.remove(fragment_path(username))
+        except FileNotFoundError:
+            pass
+    with open(MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(new_manifest, f)
 
+    print(f"Merged file saved as {OUTPUT_FILE}")
 
-# Save the merged result
-with open("twitter_location_only_completed.json", "w", encoding="utf-8") as f:
-    json.dump(location_data, f, ensure_ascii=False, indent=2)
 
-print("Merged file saved as twitter_location_only_completed.json")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""Remembers accounts that could not be scraped, and until when to skip them.
+
+A failed profile used to be retried on every run (or, with a half-empty
+result file, never again). Each failure is now classified and stored with a
+re-check time that depends on its state:
+
+* permanent: ``not_found``, ``suspended`` (re-checked after 30 days)
+* semi-permanent: ``protected`` (re-checked after 7 days)
+* transient: ``timeout``, ``rate_limited``, ``error`` (retried with
+  exponential backoff, 30 minutes doubling up to a day)
+
+The database uses WAL mode like profile_store.py, so the run_shards.py
+workers can share it. A successful scrape removes the account.
+
+    python negative_cache.py list --db negative_cache.db
+    python negative_cache.py forget --db negative_cache.db someuser
+"""
+import argparse
+import sqlite3
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+DEFAULT_DB = "negative_cache.db"
+BUSY_TIMEOUT = 30  # seconds
+
+TRANSIENT_STATES = ("timeout", "rate_limited", "error")
+
+STATE_TTL = {
+    "not_found": 30 * 24 * 3600,
+    "suspended": 30 * 24 * 3600,
+    "protected": 7 * 24 * 3600,
+}
+TRANSIENT_BACKOFF = 30 * 60  # first retry delay, doubled per consecutive failure
+TRANSIENT_MAX_BACKOFF = 24 * 3600
+
+# Lower-cased fragments of the texts X shows on unavailable profiles
+STATE_MARKERS = (
+    ("suspended", ("account suspended", "suspends accounts")),
+    ("not_found", ("doesn’t exist", "doesn't exist", "does not exist", "page doesn’t exist", "n'existe pas")),
+    ("protected", ("posts are protected", "tweets are protected", "sont protégés")),
+    ("rate_limited", ("rate limit", "try again later", "something went wrong", "réessayer")),
+)
+
+COLUMNS = ("username", "state", "detail", "attempts", "first_seen", "last_seen", "retry_at")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS failures (
+    username TEXT PRIMARY KEY COLLATE NOCASE,
+    state TEXT NOT NULL,
+    detail TEXT,
+    attempts INTEGER NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    retry_at REAL NOT NULL
+);
+"""
+
+
+def classify_failure(text: str, default: str = "error") -> str:
+    """The state for an error text shown on a profile page."""
+    lowered = (text or "").lower()
+    for state, markers in STATE_MARKERS:
+        if any(marker in lowered for marker in markers):
+            return state
+    return default
+
+
+def retry_delay(state: str, attempts: int) -> float:
+    """Seconds until an account in ``state`` is tried again after ``attempts`` failures."""
+    if state in STATE_TTL:
+        return STATE_TTL[state]
+    return min(TRANSIENT_BACKOFF * 2 ** max(0, attempts - 1), TRANSIENT_MAX_BACKOFF)
+
+
+def format_delay(seconds: float) -> str:
+    if seconds >= 24 * 3600:
+        return f"{seconds / (24 * 3600):.1f}d"
+    if seconds >= 3600:
+        return f"{seconds / 3600:.1f}h"
+    return f"{seconds / 60:.0f}m"
+
+
+class NegativeCache:
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT * 1000}")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get(self, username: str) -> Optional[Dict]:
+        row = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM failures WHERE username = ?", (username,)).fetchone()
+        return dict(zip(COLUMNS, row)) if row else None
+
+    def blocked_usernames(self, now: Optional[float] = None) -> Dict[str, Dict]:
+        """Lower-cased handle -> failure record for every account still to be skipped."""
+        rows = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM failures WHERE retry_at > ?", (now or time.time(),))
+        return {row[0].lower(): dict(zip(COLUMNS, row)) for row in rows}
+
+    def record(self, username: str, state: str, detail: str = "") -> Dict:
+        """Store a failure; repeated failures in the same state back off further."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous = self.get(username)
+            attempts = previous["attempts"] + 1 if previous and previous["state"] == state else 1
+            first_seen = previous["first_seen"] if previous else now
+            retry_at = now + retry_delay(state, attempts)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO failures (username, state, detail, attempts, first_seen, last_seen, retry_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (username, state, (detail or "")[:500], attempts, first_seen, now, retry_at),
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return self.get(username)
+
+    def clear(self, username: str) -> None:
+        self.conn.execute("DELETE FROM failures WHERE username = ?", (username,))
+
+    def entries(self) -> List[Dict]:
+        rows = self.conn.execute(f"SELECT {', '.join(COLUMNS)} FROM failures ORDER BY state, username")
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+
+def summarize(entries: List[Dict]) -> str:
+    counts = Counter(entry["state"] for entry in entries)
+    return ", ".join(f"{count} {state}" for state, count in counts.most_common()) or "none"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or edit the cache of unavailable accounts")
+    parser.add_argument("command", choices=["list", "forget"])
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"database path (default: {DEFAULT_DB})")
+    parser.add_argument("usernames", nargs="*", help="forget: these users (default: every transient failure)")
+    args = parser.parse_args()
+
+    with NegativeCache(args.db) as cache:
+        if args.command == "list":
+            now = time.time()
+            entries = cache.entries()
+            for entry in entries:
+                wait = entry["retry_at"] - now
+                when = f"retry in {format_delay(wait)}" if wait > 0 else "due for retry"
+                print(f"@{entry['username']}: {entry['state']} x{entry['attempts']}, {when}  {entry['detail'] or ''}".rstrip())
+            print(f"{len(entries)} accounts: {summarize(entries)}")
+        else:
+            usernames = args.usernames or [e["username"] for e in cache.entries() if e["state"] in TRANSIENT_STATES]
+            for username in usernames:
+                cache.clear(username)
+            print(f"Forgot {len(usernames)} accounts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""SQLite storage for scraped profiles.
+
+An alternative to one JSON file per user: a single database in WAL mode with
+tables for profiles, tweets and follower/following edges. Several processes
+(e.g. the workers started by run_shards.py) can write to it at the same time,
+"already scraped?" is a primary-key lookup, and ``export`` writes the usual
+per-user JSON files for downstream scripts such as merge_profiles.py.
+
+    python profile_store.py export --db scraped_profiles.db --out scraped_profiles
+    python profile_store.py import --db scraped_profiles.db --src scraped_profiles
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional, Set
+
+DEFAULT_DB = "scraped_profiles.db"
+BUSY_TIMEOUT = 30  # seconds a writer waits for another process' transaction
+
+# (result key, tweets.kind) and (result key, edges.direction)
+TWEET_KINDS = (("tweets", "tweet"), ("retweets", "retweet"))
+EDGE_DIRECTIONS = ("followers", "following")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    username TEXT PRIMARY KEY COLLATE NOCASE,
+    name TEXT,
+    bio TEXT,
+    followers_count INTEGER,
+    following_count INTEGER,
+    profile_image_url TEXT,
+    unavailable TEXT,       -- state of a result kept despite a failure (protected), else NULL
+    scraped_at REAL NOT NULL,
+    profile TEXT NOT NULL,  -- user_profile object as JSON
+    extra TEXT NOT NULL     -- other top-level keys of the result as JSON
+);
+CREATE TABLE IF NOT EXISTS tweets (
+    username TEXT NOT NULL COLLATE NOCASE,
+    tweet_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    tweet_date TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (username, tweet_id)
+);
+CREATE INDEX IF NOT EXISTS tweets_by_user ON tweets (username, kind, position);
+CREATE INDEX IF NOT EXISTS tweets_by_id ON tweets (tweet_id);
+CREATE TABLE IF NOT EXISTS edges (
+    username TEXT NOT NULL COLLATE NOCASE,
+    direction TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT,
+    bio TEXT,
+    PRIMARY KEY (username, direction, position)
+);
+CREATE INDEX IF NOT EXISTS edges_by_name ON edges (name);
+"""
+
+
+def tweet_id_for(kind: str, record: Dict) -> str:
+    """Stable ID for a stored tweet; the result dicts carry no status ID."""
+    if kind == "retweet":
+        key = (record.get("retweet_username"), record.get("retweet_main_content"), record.get("retweet_date"))
+    else:
+        key = (record.get("tweet_content"), record.get("tweet_date"))
+    return hashlib.md5(json.dumps([kind, *key], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def unavailable_state(result: Dict) -> Optional[str]:
+    """The failure state a result was saved with (e.g. "protected"), or None if it is complete."""
+    unavailable = result.get("unavailable")
+    if not unavailable:
+        return None
+    return (unavailable.get("state") if isinstance(unavailable, dict) else None) or "unknown"
+
+
+class ProfileStore:
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT * 1000}")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self) -> None:
+        """Add the unavailable column to databases created before it existed."""
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(profiles)")}
+        if "unavailable" in columns:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have migrated while we waited for the lock
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(profiles)")}
+            if "unavailable" not in columns:
+                self.conn.execute("ALTER TABLE profiles ADD COLUMN unavailable TEXT")
+                states = [(unavailable_state(json.loads(extra)), username)
+                          for username, extra in self.conn.execute("SELECT username, extra FROM profiles").fetchall()]
+                self.conn.executemany("UPDATE profiles SET unavailable = ? WHERE username = ?",
+                                      [(state, username) for state, username in states if state])
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self.conn.close()
+
+    # Results marked unavailable (the header of a protected account) are not
+    # scraped: they are tried again once the negative cache allows it
+
+    def is_scraped(self, username: str) -> bool:
+        return self.conn.execute("SELECT 1 FROM profiles WHERE username = ? AND unavailable IS NULL",
+                                 (username,)).fetchone() is not None
+
+    def scraped_usernames(self) -> Set[str]:
+        """Lower-cased handles of every scraped profile, for bulk skip checks."""
+        return {row[0].lower() for row in self.conn.execute("SELECT username FROM profiles WHERE unavailable IS NULL")}
+
+    def usernames(self) -> List[str]:
+        return [row[0] for row in self.conn.execute("SELECT username FROM profiles ORDER BY username")]
+
+    def save_result(self, username: str, result: Dict) -> None:
+        """Replace everything stored for ``username`` with a scrape_twitter/fetch_user result."""
+        profile = result.get("user_profile") or {}
+        extra = {k: v for k, v in result.items()
+                 if k not in ("user_profile", "tweets", "retweets") + EDGE_DIRECTIONS}
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent writers queue
+        # on busy_timeout instead of failing halfway through the transaction
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO profiles (username, name, bio, followers_count, following_count, "
+                "profile_image_url, unavailable, scraped_at, profile, extra) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (username, profile.get("name"), profile.get("bio"), profile.get("followers_count"),
+                 profile.get("following_count"), result.get("profile_image_url"),
+                 unavailable_state(result), time.time(),
+                 json.dumps(profile, ensure_ascii=False), json.dumps(extra, ensure_ascii=False)),
+            )
+            self.conn.execute("DELETE FROM tweets WHERE username = ?", (username,))
+            self.conn.execute("DELETE FROM edges WHERE username = ?", (username,))
+            for key, kind in TWEET_KINDS:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO tweets (username, tweet_id, kind, position, tweet_date, data) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(username, tweet_id_for(kind, record), kind, position,
+                      record.get("tweet_date") or record.get("retweet_date"), json.dumps(record, ensure_ascii=False))
+                     for position, record in enumerate(result.get(key) or [])],
+                )
+            for direction in EDGE_DIRECTIONS:
+                prefix = "follower" if direction == "followers" else "following"
+                self.conn.executemany(
+                    "INSERT INTO edges (username, direction, position, name, bio) VALUES (?, ?, ?, ?, ?)",
+                    [(username, direction, position, record.get(f"{prefix}_name"), record.get(f"{prefix}_bio"))
+                     for position, record in enumerate(result.get(direction) or [])],
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def load_result(self, username: str) -> Optional[Dict]:
+        """Rebuild the per-user JSON layout written by fetch_user."""
+        row = self.conn.execute("SELECT profile, extra FROM profiles WHERE username = ?", (username,)).fetchone()
+        if row is None:
+            return None
+        result = {"user_profile": json.loads(row[0]), "following": [], "followers": []}
+        for direction in EDGE_DIRECTIONS:
+            prefix = "follower" if direction == "followers" else "following"
+            result[direction] = [
+                {f"{prefix}_name": name, f"{prefix}_bio": bio}
+                for name, bio in self.conn.execute(
+                    "SELECT name, bio FROM edges WHERE username = ? AND direction = ? ORDER BY position",
+                    (username, direction))
+            ]
+        for key, kind in TWEET_KINDS:
+            records = [json.loads(data) for (data,) in self.conn.execute(
+                "SELECT data FROM tweets WHERE username = ? AND kind = ? ORDER BY position", (username, kind))]
+            if records:
+                result[key] = records
+        result.update(json.loads(row[1]))
+        return result
+
+    def export_json(self, folder: str, usernames: Optional[List[str]] = None) -> int:
+        """Write ``<folder>/<username>.json`` for the given (default: all) users."""
+        os.makedirs(folder, exist_ok=True)
+        count = 0
+        for username in usernames or self.usernames():
+            result = self.load_result(username)
+            if result is None:
+                print(f"@{username} is not in the database, skipping")
+                continue
+            with open(os.path.join(folder, f"{username}.json"), "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+            count += 1
+        return count
+
+    def import_json(self, folder: str) -> int:
+        """Load existing per-user JSON files into the database."""
+        count = 0
+        for path in sorted(glob.glob(os.path.join(folder, "*.json"))):
+            username = os.path.splitext(os.path.basename(path))[0]
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    result = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Could not read {path}: {e}")
+                continue
+            if isinstance(result, dict):
+                self.save_result(username, result)
+                count += 1
+        return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or import the SQLite profile store")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"database path (default: {DEFAULT_DB})")
+    parser.add_argument("--out", default="scraped_profiles", help="export: folder for the per-user JSON files")
+    parser.add_argument("--src", default="scraped_profiles", help="import: folder with per-user JSON files")
+    parser.add_argument("usernames", nargs="*", help="export: only these users")
+    args = parser.parse_args()
+
+    with ProfileStore(args.db) as store:
+        if args.command == "export":
+            count = store.export_json(args.out, args.usernames or None)
+            print(f"Exported {count} profiles to {args.out}")
+        else:
+            count = store.import_json(args.src)
+            print(f"Imported {count} profiles into {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Adaptive pagination for the discovery queries of get_users.py.
+
+Instead of asking every query for a fixed number of pages, pages are
+requested in waves: one more page for every query that is still productive.
+A query stops once its pages yield fewer new usernames than a threshold
+(for ``patience`` pages in a row), return nothing, or repeat the previous
+page. The pages it did not use stay in the overall budget and go to the
+queries that keep producing users.
+
+The yield of every query is saved to a stats file, and the next run starts
+with the queries expected to yield the most (unknown queries first).
+"""
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_STATS_FILE = "query_stats.json"
+YIELD_SMOOTHING = 0.5  # weight of the latest run in a query's expected yield
+
+
+def load_query_stats(path: str = DEFAULT_STATS_FILE) -> Dict[str, Dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            stats = json.load(f)
+        return stats if isinstance(stats, dict) else {}
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_query_stats(stats: Dict[str, Dict], path: str = DEFAULT_STATS_FILE) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(stats, f, ensure_ascii=False, indent=4)
+    os.replace(tmp_path, path)
+
+
+class PaginationPlanner:
+    def __init__(self, queries: List[str], stats: Dict[str, Dict], pages_per_query: int,
+                 min_new_users: int = 1, patience: int = 2, max_pages: Optional[int] = None):
+        self.stats = stats
+        self.min_new_users = min_new_users
+        self.patience = patience
+        self.max_pages = max_pages or 2 * pages_per_query
+        # Same total number of pages as the fixed plan, but spent where it pays off
+        self.budget = len(queries) * pages_per_query
+
+        # Queries without history first (they must be explored), then by expected yield
+        unique = list(dict.fromkeys(queries))
+        self.order = sorted(unique, key=lambda q: -self.expected_yield(q))
+        self.active = list(self.order)
+        self.next_page = {q: 1 for q in unique}
+        self.low_pages = {q: 0 for q in unique}
+        self.last_links: Dict[str, Tuple[str, ...]] = {}
+        self.run = {q: {"pages": 0, "results": 0, "new_users": 0} for q in unique}
+
+    def expected_yield(self, query: str) -> float:
+        entry = self.stats.get(query)
+        return float("inf") if not entry else entry.get("expected_yield", 0.0)
+
+    def next_wave(self) -> List[Tuple[str, int]]:
+        """The next page of every active query, as far as the budget allows."""
+        wave = []
+        for q in self.active:
+            if self.budget <= 0:
+                break
+            if self.next_page[q] > self.max_pages:
+                continue
+            wave.append((q, self.next_page[q]))
+            self.next_page[q] += 1
+            self.budget -= 1
+        return wave
+
+    def record(self, query: str, page: int, data: Optional[dict], new_users: int) -> None:
+        """Account for one fetched page and stop the query if it stopped paying off."""
+        links = tuple(item.get("link", "") for item in (data or {}).get("organic", []))
+        run = self.run[query]
+        run["pages"] += 1
+        run["results"] += len(links)
+        run["new_users"] += new_users
+
+        reason = None
+        if data is None:
+            reason = "request failed"
+        elif not links:
+            reason = "no results"
+        elif links == self.last_links.get(query):
+            reason = "same results as the previous page"
+        else:
+            self.low_pages[query] = self.low_pages[query] + 1 if new_users < self.min_new_users else 0
+            if self.low_pages[query] >= self.patience:
+                reason = f"fewer than {self.min_new_users} new users on {self.patience} pages in a row"
+        self.last_links[query] = links
+
+        if reason and query in self.active:
+            self.active.remove(query)
+            print(f"  Stopped paging {query!r} after page {page}: {reason}.")
+
+    def finish(self) -> Dict[str, Dict]:
+        """Fold this run's yields into the stats and return them."""
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+        for q, run in self.run.items():
+            if not run["pages"]:
+                continue
+            rate = run["new_users"] / run["pages"]
+            entry = self.stats.get(q)
+            if entry:
+                expected = YIELD_SMOOTHING * rate + (1 - YIELD_SMOOTHING) * entry.get("expected_yield", rate)
+                entry.update({
+                    "runs": entry.get("runs", 0) + 1,
+                    "pages": entry.get("pages", 0) + run["pages"],
+                    "results": entry.get("results", 0) + run["results"],
+                    "new_users": entry.get("new_users", 0) + run["new_users"],
+                })
+            else:
+                expected = rate
+                entry = self.stats[q] = {"runs": 1, **run}
+            entry["last_run_pages"] = run["pages"]
+            entry["last_run_hit_rate"] = round(rate, 3)
+            entry["expected_yield"] = round(expected, 3)
+            entry["last_run"] = now
+        return self.stats
+
+    def summary(self) -> str:
+        pages = sum(run["pages"] for run in self.run.values())
+        users = sum(run["new_users"] for run in self.run.values())
+        return f"{pages} pages requested, {users} new users, {len(self.active)} queries still productive"
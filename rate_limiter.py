@@ -0,0 +1,116 @@
+"""Adaptive token-bucket rate limiter shared by the scrapers.
+
+The bucket refills at ``rate`` tokens per second. Every success adds
+``increase`` to the rate (additive increase) and every throttle signal
+multiplies it by ``decrease`` and pauses all callers for a cooldown
+(multiplicative decrease), so the pace converges on what the remote side
+accepts.
+
+Several processes can share throttle signals through a small JSON state
+file: a process that gets throttled publishes its reduced rate and cooldown,
+and the others adopt them on their next acquire.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Optional
+
+
+class AdaptiveRateLimiter:
+    def __init__(self, rate: float = 2.0, min_rate: float = 0.2, max_rate: float = 8.0,
+                 increase: float = 0.05, decrease: float = 0.5, burst: float = 2.0,
+                 cooldown: float = 5.0, max_cooldown: float = 120.0,
+                 shared_file: Optional[str] = None, name: str = "rate limiter"):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.burst = burst
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.shared_file = shared_file
+        self.name = name
+
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.cooldown_until = 0.0  # wall-clock time, comparable across processes
+        self.consecutive_throttles = 0
+        self.throttle_count = 0
+        self._shared_mtime = 0.0
+        self._lock = asyncio.Lock()
+
+    def configure(self, rate: Optional[float] = None, shared_file: Optional[str] = None) -> None:
+        """Change the current rate and/or the shared state file."""
+        if rate is not None:
+            self.rate = min(self.max_rate, max(self.min_rate, rate))
+        if shared_file is not None:
+            self.shared_file = shared_file
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self._lock:
+            while True:
+                self._sync_shared()
+                pause = self.cooldown_until - time.time()
+                if pause > 0:
+                    await asyncio.sleep(pause)
+                    continue
+
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def on_success(self) -> None:
+        """Additive increase after a request that was not throttled."""
+        self.consecutive_throttles = 0
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, reason: str = "") -> None:
+        """Multiplicative decrease and a cooldown after a rate-limit signal."""
+        self.consecutive_throttles += 1
+        self.throttle_count += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.tokens = 0
+        cooldown = min(self.max_cooldown, self.base_cooldown * 2 ** (self.consecutive_throttles - 1))
+        self.cooldown_until = max(self.cooldown_until, time.time() + cooldown)
+        print(f"[{self.name}] Throttled{f' ({reason})' if reason else ''}: "
+              f"rate now {self.rate:.2f} req/s, pausing {cooldown:.0f}s")
+        self._publish()
+
+    def summary(self) -> str:
+        return f"rate {self.rate:.2f} req/s, {self.throttle_count} throttles"
+
+    def _publish(self) -> None:
+        if not self.shared_file:
+            return
+        state = {"rate": self.rate, "cooldown_until": self.cooldown_until, "updated": time.time()}
+        tmp_path = f"{self.shared_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.shared_file)
+            self._shared_mtime = os.path.getmtime(self.shared_file)
+        except OSError as e:
+            print(f"[{self.name}] Could not publish shared state: {e}")
+
+    def _sync_shared(self) -> None:
+        """Adopt throttle signals another process published since the last check."""
+        if not self.shared_file:
+            return
+        try:
+            mtime = os.path.getmtime(self.shared_file)
+            if mtime <= self._shared_mtime:
+                return
+            with open(self.shared_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._shared_mtime = mtime
+        self.rate = max(self.min_rate, min(self.rate, state.get("rate", self.rate)))
+        self.cooldown_until = max(self.cooldown_until, state.get("cooldown_until", 0.0))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Run fetch_user.py as several worker processes, one per shard.
+
+Usernames are assigned to shards by hashing the handle (see
+fetch_user.shard_of), so two workers never scrape the same account. Each
+worker owns its own browser and writes a progress file; this launcher polls
+those files, prints a combined progress line and writes a merged summary
+when every worker has exited.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RUN_DIR = os.path.join(SCRIPT_DIR, "shard_runs")
+POLL_INTERVAL = 10  # seconds between progress reports
+
+
+def read_progress(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def start_workers(shards: int, concurrency: int, rate: float, extra_args: list) -> list:
+    os.makedirs(RUN_DIR, exist_ok=True)
+    # Workers publish throttle signals here so one 429 slows every shard down
+    shared_rate_file = os.path.join(RUN_DIR, "rate_limit.json")
+    if os.path.exists(shared_rate_file):
+        os.remove(shared_rate_file)
+    workers = []
+    for index in range(shards):
+        progress_file = os.path.join(RUN_DIR, f"shard-{index}.progress.json")
+        log_path = os.path.join(RUN_DIR, f"shard-{index}.log")
+        # Drop the previous run's snapshot so stale numbers are never merged
+        if os.path.exists(progress_file):
+            os.remove(progress_file)
+        cmd = [
+            sys.executable, os.path.join(SCRIPT_DIR, "fetch_user.py"),
+            "--shard", f"{index}/{shards}",
+            "--concurrency", str(concurrency),
+            "--progress-file", progress_file,
+            "--shared-rate-file", shared_rate_file,
+        ] + extra_args
+        if rate:
+            # Split the overall budget evenly between the workers
+            cmd += ["--rate", f"{rate / shards:g}"]
+        log = open(log_path, "w", encoding="utf-8")
+        proc = subprocess.Popen(cmd, cwd=os.getcwd(), stdout=log, stderr=subprocess.STDOUT)
+        workers.append({"index": index, "proc": proc, "log": log, "progress_file": progress_file, "log_path": log_path})
+        print(f"Started shard {index}/{shards} (pid {proc.pid}), log: {log_path}")
+    return workers
+
+
+def merge_progress(workers: list) -> dict:
+    merged = {"total": 0, "done": 0, "failed": 0, "succeeded_users": [], "failed_users": [], "shards": {}}
+    for worker in workers:
+        progress = read_progress(worker["progress_file"])
+        merged["total"] += progress.get("total", 0)
+        merged["done"] += progress.get("done", 0)
+        merged["failed"] += progress.get("failed", 0)
+        merged["succeeded_users"].extend(progress.get("succeeded_users", []))
+        merged["failed_users"].extend(progress.get("failed_users", []))
+        merged["shards"][worker["index"]] = {
+            "total": progress.get("total", 0),
+            "done": progress.get("done", 0),
+            "failed": progress.get("failed", 0),
+            "returncode": worker["proc"].returncode,
+            "log": worker["log_path"],
+        }
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape users_extended.json with one fetch_user.py process per shard")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1,
+                        help="number of worker processes (default: CPU count)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="concurrent users inside each worker (default: 1)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="overall initial requests/second, split evenly between workers")
+    args, extra_args = parser.parse_known_args()
+
+    started = time.monotonic()
+    workers = start_workers(max(1, args.shards), args.concurrency, args.rate, extra_args)
+
+    try:
+        while any(w["proc"].poll() is None for w in workers):
+            time.sleep(POLL_INTERVAL)
+            merged = merge_progress(workers)
+            running = sum(1 for w in workers if w["proc"].poll() is None)
+            finished = merged["done"] + merged["failed"]
+            elapsed = time.monotonic() - started
+            rate = finished / (elapsed / 60) if elapsed > 0 else 0.0
+            print(f"[progress] {finished}/{merged['total']} users finished "
+                  f"({merged['failed']} failed), {running} workers running, {rate:.2f} users/minute")
+    except KeyboardInterrupt:
+        print("Interrupted, stopping workers...")
+        for w in workers:
+            if w["proc"].poll() is None:
+                w["proc"].terminate()
+        for w in workers:
+            w["proc"].wait()
+    finally:
+        for w in workers:
+            w["log"].close()
+
+    merged = merge_progress(workers)
+    elapsed = time.monotonic() - started
+    finished = merged["done"] + merged["failed"]
+    merged["elapsed_seconds"] = round(elapsed, 1)
+    merged["users_per_minute"] = round(finished / (elapsed / 60), 2) if elapsed > 0 else 0.0
+
+    summary_path = os.path.join(RUN_DIR, "summary.json")
+    with open(summary_path, "w", encoding="utf-8") as f:
+        json.dump(merged, f, ensure_ascii=False, indent=2)
+
+    for index, shard in merged["shards"].items():
+        print(f"Shard {index}: {shard['done']} succeeded, {shard['failed']} failed, exit code {shard['returncode']}")
+    print(f"\nAll shards finished: {merged['done']} succeeded, {merged['failed']} failed in {elapsed:.1f}s "
+          f"({merged['users_per_minute']} users/minute). Summary saved to {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
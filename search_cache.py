@@ -0,0 +1,87 @@
+"""Persistent cache for search API responses.
+
+Responses are stored in a small SQLite database keyed by a hash of the full
+request payload (q, gl, location, page), so re-running get_users.py only
+pays for requests that were never made before or whose cached response is
+older than the TTL. The total size is capped; the least recently used
+responses are evicted first.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from typing import Dict, Optional
+
+DEFAULT_CACHE_FILE = "search_cache.db"
+DEFAULT_TTL = 7 * 24 * 3600  # seconds
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_by_access ON responses (accessed);
+"""
+
+
+def payload_key(payload: Dict) -> str:
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    def __init__(self, path: str = DEFAULT_CACHE_FILE, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def get(self, payload: Dict) -> Optional[dict]:
+        """The cached response for ``payload``, or None if missing or expired."""
+        key = payload_key(payload)
+        row = self.conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or (self.ttl and time.time() - row[1] > self.ttl):
+            self.misses += 1
+            return None
+        self.conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, payload: Dict, response: dict) -> None:
+        text = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (key, payload, response, size, created, accessed) VALUES (?, ?, ?, ?, ?, ?)",
+            (payload_key(payload), json.dumps(payload, ensure_ascii=False), text, len(text.encode("utf-8")), now, now),
+        )
+        self._evict()
+
+    def _evict(self) -> None:
+        """Drop least recently used responses until the cache fits in ``max_bytes``."""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        doomed = []
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            doomed.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def summary(self) -> str:
+        return f"{self.hits} cache hits, {self.misses} misses"
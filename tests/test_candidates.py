@@ -0,0 +1,39 @@
+import json
+
+from candidates import CandidateFilter, load_candidates, normalize_handle, rejection_reason
+
+
+def test_normalize_handle():
+    assert normalize_handle(" @Foo ") == "Foo"
+    assert normalize_handle("https://x.com/Foo/status/1") == "Foo"
+    assert normalize_handle("twitter.com/Foo?lang=fr") == "Foo"
+
+
+def test_rejection_reason():
+    assert rejection_reason("data_ma") is None
+    assert rejection_reason("Search") == "reserved path"
+    assert rejection_reason("i") == "reserved path"
+    assert rejection_reason("sixteen_chars_xx") == "invalid handle"
+    assert rejection_reason("with-dash") == "invalid handle"
+    assert rejection_reason("") == "invalid handle"
+
+
+def test_duplicates_are_merged_across_inputs(tmp_path):
+    (tmp_path / "a.json").write_text(json.dumps([
+        {"Twitter Username": "Foo"}, {"Twitter Username": "hashtag"}, {"Twitter Username": "foo"}, {},
+    ]), encoding="utf-8")
+    (tmp_path / "b.json").write_text(json.dumps([
+        {"Twitter Username": "@FOO"}, {"Twitter Username": "Bar"}, {"Twitter Username": "Bar"},
+    ]), encoding="utf-8")
+
+    candidates = CandidateFilter()
+    paths = [str(tmp_path / "a.json"), str(tmp_path / "b.json"), str(tmp_path / "missing.json")]
+    assert load_candidates(paths, candidates) == ["Foo", "Bar"]
+    assert candidates.dropped == {"case duplicate": 2, "reserved path": 1, "invalid handle": 1, "duplicate": 1}
+    assert candidates.report().splitlines()[0] == "candidates: 2 of 7 kept"
+
+
+def test_check_does_not_deduplicate():
+    candidates = CandidateFilter()
+    assert [candidates.check(h) for h in ("Foo", "foo", "explore")] == ["Foo", "foo", None]
+    assert candidates.dropped == {"reserved path": 1}
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+import fetch_user  # noqa: E402
+
+
+def fake_scraper(started):
+    """Stands in for a scrape_* function: emits records until it is cancelled."""
+    async def scrape(*args, on_record=None, **kwargs):
+        started.append(asyncio.current_task())
+        i = 0
+        while True:
+            await fetch_user.emit_record(on_record, "tweet", {"i": i})
+            i += 1
+    return scrape
+
+
+@pytest.mark.parametrize("wrapper, scraper, args", [
+    ("iter_tweets", "scrape_tweets", (None, "someone")),
+    ("iter_followers", "scrape_followers", (None, "someone")),
+    ("iter_following", "scrape_following", (None, "someone")),
+    ("iter_twitter", "scrape_twitter", ("someone",)),
+])
+def test_aclose_cancels_the_scrape_task(monkeypatch, wrapper, scraper, args):
+    started = []
+    monkeypatch.setattr(fetch_user, scraper, fake_scraper(started))
+
+    async def consume():
+        records = getattr(fetch_user, wrapper)(*args, max_buffered=2)
+        received = [await records.__anext__() for _ in range(3)]
+        await asyncio.sleep(0)  # let the producer fill the bounded queue
+        await records.aclose()
+        # Checked inside the loop: asyncio.run() would cancel a leftover task on exit
+        assert len(started) == 1 and started[0].cancelled()
+        return received
+
+    received = asyncio.run(consume())
+    assert [record["i"] for _, record in received] == [0, 1, 2]
+
+
+def test_records_and_errors_of_a_finished_scrape(monkeypatch):
+    async def scrape(*args, on_record=None, **kwargs):
+        for i in range(5):
+            await fetch_user.emit_record(on_record, "tweet", {"i": i})
+        raise RuntimeError("page crashed")
+
+    monkeypatch.setattr(fetch_user, "scrape_tweets", scrape)
+
+    async def consume():
+        received = []
+        with pytest.raises(RuntimeError, match="page crashed"):
+            async for _, record in fetch_user.iter_tweets(None, "someone", max_buffered=2):
+                received.append(record["i"])
+        return received
+
+    assert asyncio.run(consume()) == [0, 1, 2, 3, 4]
+
+
+AVATAR = "https://pbs.twimg.com/profile_images/1/photo_normal.jpg"
+
+
+def test_resource_blocker_blocks_avatars_unless_allowed():
+    blocker = fetch_user.ResourceBlocker()
+    assert blocker._classify("image", AVATAR) == "image"
+    assert blocker._classify("image", "https://pbs.twimg.com/media/abc.jpg") == "image"
+    assert blocker._classify("xhr", "https://x.com/i/api/1.1/jot/client_event.json") == "tracking"
+    assert blocker._classify("xhr", "https://x.com/i/api/graphql/abc/UserTweets") is None
+    assert fetch_user.ResourceBlocker(allow_avatar=True)._classify("image", AVATAR) is None
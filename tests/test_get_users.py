@@ -0,0 +1,143 @@
+"""get_users.py against a local stub of the search API."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("dotenv")
+
+import get_users  # noqa: E402
+
+QUERIES = ["data scientist maroc", "ingénieur data casablanca"]
+USERS_PER_PAGE = 3
+
+
+def search_result(payload):
+    """A Serper-like response: USERS_PER_PAGE profiles per page plus links that are not profiles."""
+    q = QUERIES.index(payload["q"])
+    organic = [
+        {"link": f"https://x.com/u{q}p{payload['page']}n{i}", "title": "Data", "snippet": "Casablanca", "position": i}
+        for i in range(USERS_PER_PAGE)
+    ]
+    organic.append({"link": "https://x.com/search?q=data", "title": "Search", "snippet": "", "position": 99})
+    organic.append({"link": "https://x.com/i/status/123", "title": "Post", "snippet": "", "position": 100})
+    return {"organic": organic}
+
+
+def batch_item(payload, fail_in_batch):
+    if (payload["q"], payload["page"]) in fail_in_batch:
+        return {"message": "Internal error", "statusCode": 500}
+    return search_result(payload)
+
+
+@pytest.fixture
+def fail_in_batch():
+    """(query, page) pairs the stub answers with an error item when they come in a batched request."""
+    return set()
+
+
+@pytest.fixture
+def stub_server(fail_in_batch):
+    """Serves single and batched searches, recording every HTTP call."""
+    calls = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            calls.append(payload)
+            if isinstance(payload, list):
+                body = [batch_item(p, fail_in_batch) for p in payload]
+            else:
+                body = search_result(payload)
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/search", calls
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(get_users, "queries", QUERIES)
+    monkeypatch.setattr(get_users, "max_pages_per_query", 2)
+    monkeypatch.setattr(get_users, "API_KEY", "test-key")
+    monkeypatch.setattr(get_users, "SEARCH_URL", get_users.SEARCH_URL)
+    return tmp_path
+
+
+def load_users(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def run(url, *extra):
+    get_users.main(["--search-url", url, "--cache-file", "cache.db", "--stats-file", "stats.json", *extra])
+
+
+def test_second_run_is_served_from_the_cache(stub_server, workdir):
+    url, calls = stub_server
+    run(url)
+    # Two waves (page 1 and page 2 of both queries), one batched request each
+    assert len(calls) == 2
+    assert all(isinstance(batch, list) and len(batch) == len(QUERIES) for batch in calls)
+    users = load_users(workdir / get_users.OUTPUT_FILE)
+    assert len(users) == len(QUERIES) * 2 * USERS_PER_PAGE
+    assert not any(u["Twitter Username"] in ("search", "i") for u in users)
+
+    run(url)
+    assert len(calls) == 2
+    assert load_users(workdir / get_users.OUTPUT_FILE) == users
+
+
+def test_failed_batch_item_is_retried_alone(stub_server, fail_in_batch, workdir):
+    url, calls = stub_server
+    fail_in_batch.add((QUERIES[1], 1))
+    run(url)
+    # Wave 1: the batch, then only the failed query on its own; wave 2: one batch
+    assert len(calls) == 3
+    assert isinstance(calls[0], list) and len(calls[0]) == len(QUERIES)
+    assert calls[1] == get_users.build_payload(QUERIES[1], 1)
+    assert isinstance(calls[2], list) and len(calls[2]) == len(QUERIES)
+    users = load_users(workdir / get_users.OUTPUT_FILE)
+    assert {u["Twitter Username"] for u in users} == {
+        f"u{q}p{page}n{i}" for q in range(len(QUERIES)) for page in (1, 2) for i in range(USERS_PER_PAGE)
+    }
+
+    # The retried page was cached like the others
+    run(url)
+    assert len(calls) == 3
+
+
+def test_cache_only_replays_without_http(stub_server, workdir):
+    url, calls = stub_server
+    run(url, "--batch-size", "1")
+    assert len(calls) == len(QUERIES) * 2
+    users = load_users(workdir / get_users.OUTPUT_FILE)
+
+    (workdir / get_users.OUTPUT_FILE).unlink()
+    run(url, "--cache-only")
+    assert len(calls) == len(QUERIES) * 2
+    assert load_users(workdir / get_users.OUTPUT_FILE) == users
+
+
+def test_no_cache_always_calls_the_api(stub_server, workdir):
+    url, calls = stub_server
+    run(url, "--no-cache")
+    run(url, "--no-cache")
+    # The second run finds no new users and stops each query after two pages
+    assert len(calls) == 4
+    assert not (workdir / "cache.db").exists()
@@ -0,0 +1,56 @@
+import json
+
+from journal import JsonJournal, load_json_list
+
+
+def by_name(record):
+    return record["name"].lower()
+
+
+def read(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_appends_go_to_the_journal_until_compaction(tmp_path):
+    path = tmp_path / "users.json"
+    journal = JsonJournal(str(path), key=by_name, compact_every=3)
+    journal.load()
+    assert journal.extend([{"name": "a"}, {"name": "A"}, {"name": "b"}]) == 2
+    assert not path.exists()
+    assert len((tmp_path / "users.json.journal").read_text(encoding="utf-8").splitlines()) == 2
+
+    journal.append({"name": "c"})  # third record compacts
+    assert read(path) == [{"name": "a"}, {"name": "b"}, {"name": "c"}]
+    assert not (tmp_path / "users.json.journal").exists()
+
+    journal.append({"name": "d"})
+    journal.close()
+    assert read(path)[-1] == {"name": "d"}
+    assert not (tmp_path / "users.json.journal").exists()
+
+
+def test_load_replays_the_journal_of_a_killed_run(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps([{"name": "a"}]), encoding="utf-8")
+    # "a" again (killed between rename and removing the journal), then a cut-off line
+    (tmp_path / "users.json.journal").write_text('{"name": "a"}\n{"name": "b"}\n{"name": "c', encoding="utf-8")
+
+    assert load_json_list(str(path)) == [{"name": "a"}, {"name": "a"}, {"name": "b"}]
+    journal = JsonJournal(str(path), key=by_name)
+    assert journal.load() == [{"name": "a"}, {"name": "b"}]
+
+    # The partial line is terminated, so the next record stays readable
+    journal.append({"name": "d"})
+    assert JsonJournal(str(path), key=by_name).load() == [{"name": "a"}, {"name": "b"}, {"name": "d"}]
+    journal.close()
+    assert read(path) == [{"name": "a"}, {"name": "b"}, {"name": "d"}]
+
+
+def test_corrupt_or_non_list_snapshot_starts_empty(tmp_path):
+    path = tmp_path / "users.json"
+    path.write_text("{", encoding="utf-8")
+    assert load_json_list(str(path)) == []
+    path.write_text('{"name": "a"}', encoding="utf-8")
+    assert load_json_list(str(path)) == []
+    assert load_json_list(str(tmp_path / "missing.json")) == []
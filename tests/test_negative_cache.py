@@ -0,0 +1,50 @@
+import negative_cache
+from negative_cache import (NegativeCache, STATE_TTL, TRANSIENT_BACKOFF, TRANSIENT_MAX_BACKOFF,
+                            classify_failure, retry_delay)
+
+
+def test_classify_failure():
+    assert classify_failure("Account suspended\nX suspends accounts that violate the X Rules") == "suspended"
+    assert classify_failure("This account doesn’t exist\nTry searching for another.") == "not_found"
+    assert classify_failure("These posts are protected") == "protected"
+    assert classify_failure("Something went wrong. Try reloading.") == "rate_limited"
+    assert classify_failure("Unexpected") == "error"
+    assert classify_failure("Unexpected", default="") == ""
+
+
+def test_retry_delay():
+    assert retry_delay("not_found", 5) == STATE_TTL["not_found"]
+    assert retry_delay("protected", 1) == STATE_TTL["protected"]
+    assert retry_delay("timeout", 1) == TRANSIENT_BACKOFF
+    assert retry_delay("timeout", 3) == 4 * TRANSIENT_BACKOFF
+    assert retry_delay("rate_limited", 20) == TRANSIENT_MAX_BACKOFF
+
+
+def test_blocked_until_the_retry_time(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(negative_cache.time, "time", lambda: now[0])
+    cache = NegativeCache(str(tmp_path / "negative.db"))
+    cache.record("Gone", "not_found", "This account doesn’t exist")
+    cache.record("Slow", "timeout")
+    assert set(cache.blocked_usernames()) == {"gone", "slow"}
+
+    now[0] += TRANSIENT_BACKOFF + 1
+    assert set(cache.blocked_usernames()) == {"gone"}
+    # A second timeout in a row waits twice as long
+    assert cache.record("slow", "timeout")["attempts"] == 2
+    assert cache.get("SLOW")["retry_at"] == now[0] + 2 * TRANSIENT_BACKOFF
+
+    now[0] += STATE_TTL["not_found"]
+    assert set(cache.blocked_usernames()) == set()
+    cache.close()
+
+
+def test_success_clears_and_state_change_resets_attempts(tmp_path):
+    cache = NegativeCache(str(tmp_path / "negative.db"))
+    cache.record("user", "timeout")
+    cache.record("user", "timeout")
+    assert cache.record("user", "protected")["attempts"] == 1
+    cache.clear("USER")
+    assert cache.get("user") is None
+    assert cache.entries() == []
+    cache.close()
@@ -0,0 +1,75 @@
+import json
+import sqlite3
+
+from profile_store import SCHEMA, ProfileStore
+
+RESULT = {
+    "user_profile": {"username": "Data Ma", "bio": "Data scientist", "name": "Data Ma",
+                     "followers_count": 1200, "following_count": 80},
+    "following": [{"following_name": "a", "following_bio": "bio a"}],
+    "followers": [{"follower_name": "b", "follower_bio": ""}, {"follower_name": "c", "follower_bio": "bio c"}],
+    "tweets": [{"tweet_content": "second", "tweet_date": "2025-03-02"},
+               {"tweet_content": "first", "tweet_date": "2025-03-01"}],
+    "profile_image_url": "https://pbs.twimg.com/profile_images/1/a_400x400.jpg",
+    "high_water_mark": {"tweet_id": "2", "tweet_date": "2025-03-02"},
+}
+
+# The profiles table before the unavailable column was added
+OLD_SCHEMA = SCHEMA.replace("    unavailable TEXT,       -- state of a result kept despite a failure (protected), else NULL\n", "")
+
+
+def test_save_and_load_round_trip(tmp_path):
+    with ProfileStore(str(tmp_path / "profiles.db")) as store:
+        store.save_result("DataMa", RESULT)
+        assert store.load_result("datama") == RESULT
+        assert store.load_result("missing") is None
+        assert store.is_scraped("DATAMA")
+        assert store.scraped_usernames() == {"datama"}
+
+
+def test_export_then_import_round_trip(tmp_path):
+    with ProfileStore(str(tmp_path / "profiles.db")) as store:
+        store.save_result("DataMa", RESULT)
+        assert store.export_json(str(tmp_path / "out")) == 1
+    with open(tmp_path / "out" / "DataMa.json", "r", encoding="utf-8") as f:
+        assert json.load(f) == RESULT
+
+    with ProfileStore(str(tmp_path / "imported.db")) as store:
+        assert store.import_json(str(tmp_path / "out")) == 1
+        assert store.load_result("DataMa") == RESULT
+
+
+def test_saving_again_replaces_the_user(tmp_path):
+    with ProfileStore(str(tmp_path / "profiles.db")) as store:
+        store.save_result("DataMa", RESULT)
+        store.save_result("DataMa", {"user_profile": {"name": "Data Ma"}, "following": [], "followers": []})
+        assert store.load_result("DataMa") == {"user_profile": {"name": "Data Ma"}, "following": [], "followers": []}
+
+
+def test_is_scraped_agrees_with_scraped_usernames(tmp_path):
+    with ProfileStore(str(tmp_path / "profiles.db")) as store:
+        store.save_result("Locked", {"user_profile": {"name": "Locked"}, "unavailable": {"state": "protected"}})
+        store.save_result("DataMa", RESULT)
+        assert not store.is_scraped("locked")
+        assert store.is_scraped("datama")
+        assert store.scraped_usernames() == {"datama"}
+        # Scraped again once the account is public
+        store.save_result("Locked", {"user_profile": {"name": "Locked"}})
+        assert store.is_scraped("Locked")
+
+
+def test_databases_without_the_unavailable_column_are_migrated(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(OLD_SCHEMA)
+    conn.executemany(
+        "INSERT INTO profiles (username, scraped_at, profile, extra) VALUES (?, 0, '{}', ?)",
+        [("Locked", json.dumps({"unavailable": {"state": "protected"}})), ("DataMa", "{}")],
+    )
+    conn.commit()
+    conn.close()
+
+    with ProfileStore(path) as store:
+        assert store.scraped_usernames() == {"datama"}
+        assert not store.is_scraped("Locked")
+        assert store.conn.execute("SELECT unavailable FROM profiles WHERE username = 'Locked'").fetchone() == ("protected",)
@@ -0,0 +1,59 @@
+from query_planner import PaginationPlanner, load_query_stats, save_query_stats
+
+
+def page(*links):
+    return {"organic": [{"link": link} for link in links]}
+
+
+def test_unproductive_queries_stop_and_leave_their_budget():
+    planner = PaginationPlanner(["good", "bad"], {}, pages_per_query=2, patience=1)
+    assert planner.next_wave() == [("good", 1), ("bad", 1)]
+    planner.record("good", 1, page("https://x.com/a"), new_users=1)
+    planner.record("bad", 1, page("https://x.com/b"), new_users=0)
+    assert planner.active == ["good"]
+    assert planner.next_wave() == [("good", 2)]
+    planner.record("good", 2, page("https://x.com/c"), new_users=1)
+    # The page "bad" did not use goes to "good", then the budget of 4 pages is spent
+    assert planner.next_wave() == [("good", 3)]
+    planner.record("good", 3, page("https://x.com/d"), new_users=1)
+    assert planner.next_wave() == []
+
+
+def test_max_pages_caps_a_single_query():
+    planner = PaginationPlanner(["only"], {}, pages_per_query=5, max_pages=2)
+    for expected in (1, 2):
+        assert planner.next_wave() == [("only", expected)]
+        planner.record("only", expected, page(f"https://x.com/u{expected}"), new_users=1)
+    assert planner.next_wave() == []
+
+
+def test_empty_failed_and_repeated_pages_stop_a_query():
+    planner = PaginationPlanner(["empty", "failed", "repeat"], {}, pages_per_query=3)
+    planner.next_wave()
+    planner.record("empty", 1, page(), new_users=0)
+    planner.record("failed", 1, None, new_users=0)
+    planner.record("repeat", 1, page("https://x.com/a"), new_users=1)
+    assert planner.active == ["repeat"]
+    planner.next_wave()
+    planner.record("repeat", 2, page("https://x.com/a"), new_users=0)
+    assert planner.active == []
+
+
+def test_stats_order_the_next_run(tmp_path):
+    planner = PaginationPlanner(["low", "high"], {}, pages_per_query=1)
+    planner.next_wave()
+    planner.record("low", 1, page("https://x.com/a"), new_users=1)
+    planner.record("high", 1, page("https://x.com/b"), new_users=5)
+    path = str(tmp_path / "stats.json")
+    save_query_stats(planner.finish(), path)
+
+    stats = load_query_stats(path)
+    assert stats["high"]["expected_yield"] == 5
+    # Known queries by expected yield, queries without history first
+    assert PaginationPlanner(["low", "high", "new"], stats, pages_per_query=1).order == ["new", "high", "low"]
+
+
+def test_missing_or_corrupt_stats_file(tmp_path):
+    assert load_query_stats(str(tmp_path / "missing.json")) == {}
+    (tmp_path / "bad.json").write_text("{", encoding="utf-8")
+    assert load_query_stats(str(tmp_path / "bad.json")) == {}
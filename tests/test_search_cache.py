@@ -0,0 +1,43 @@
+import search_cache
+from search_cache import SearchCache
+
+PAYLOAD = {"q": "data scientist maroc", "gl": "ma", "location": "Morocco", "page": 1}
+
+
+def test_hit_and_miss(tmp_path):
+    cache = SearchCache(str(tmp_path / "cache.db"))
+    assert cache.get(PAYLOAD) is None
+    cache.put(PAYLOAD, {"organic": [{"link": "https://x.com/someone"}]})
+    assert cache.get(PAYLOAD) == {"organic": [{"link": "https://x.com/someone"}]}
+    assert cache.get(dict(PAYLOAD, page=2)) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    cache.close()
+
+
+def test_expired_entries_are_misses(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search_cache.time, "time", lambda: now[0])
+    cache = SearchCache(str(tmp_path / "cache.db"), ttl=60)
+    cache.put(PAYLOAD, {"organic": []})
+    now[0] += 59
+    assert cache.get(PAYLOAD) == {"organic": []}
+    now[0] += 2
+    assert cache.get(PAYLOAD) is None
+    cache.close()
+
+
+def test_least_recently_used_is_evicted(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search_cache.time, "time", lambda: now[0])
+    response = {"organic": [{"snippet": "x" * 100}]}
+    cache = SearchCache(str(tmp_path / "cache.db"), max_bytes=300)  # room for two responses
+    for page in (1, 2):
+        cache.put(dict(PAYLOAD, page=page), response)
+        now[0] += 1
+    cache.get(dict(PAYLOAD, page=1))  # page 2 is now the least recently used
+    now[0] += 1
+    cache.put(dict(PAYLOAD, page=3), response)
+    assert cache.get(dict(PAYLOAD, page=2)) is None
+    assert cache.get(dict(PAYLOAD, page=1)) == response
+    assert cache.get(dict(PAYLOAD, page=3)) == response
+    cache.close()